@@ -0,0 +1,30 @@
+"""add hash index on oauth_accounts.provider_subject
+
+Revision ID: a6c3d4e5f7b8
+Revises: f5b2c3d4e6a7
+Create Date: 2026-10-15
+
+Google login only ever looks an account up by exact provider_subject. A
+hash index is smaller than the (provider, provider_subject) btree behind
+uq_oauth_provider_subject and serves that equality probe directly. The
+unique btree stays, it still enforces the constraint and backs ON CONFLICT.
+"""
+from typing import Sequence, Union
+from alembic import op
+
+
+revision: str = "a6c3d4e5f7b8"
+down_revision: Union[str, None] = "f5b2c3d4e6a7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_oauth_subject_hash "
+        "ON oauth_accounts USING hash (provider_subject)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_oauth_subject_hash")
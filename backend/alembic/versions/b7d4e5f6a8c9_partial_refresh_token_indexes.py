@@ -0,0 +1,44 @@
+"""restrict refresh_tokens indexes to live tokens
+
+Revision ID: b7d4e5f6a8c9
+Revises: a6c3d4e5f7b8
+Create Date: 2026-10-15
+
+Refresh validation filters on token_hash with revoked_at IS NULL, and
+revoked rows pile up over time. Indexing only non-revoked rows keeps the
+unique index proportional to the live set.
+
+  - ux_refresh_tokens_active (token_hash) WHERE revoked_at IS NULL,
+    replacing ux_refresh_tokens_token_hash
+  - ix_refresh_tokens_cleanup (expires_at) WHERE revoked_at IS NULL, for
+    sweeping expired tokens
+"""
+from typing import Sequence, Union
+from alembic import op
+
+
+revision: str = "b7d4e5f6a8c9"
+down_revision: Union[str, None] = "a6c3d4e5f7b8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_refresh_tokens_active "
+        "ON refresh_tokens (token_hash) WHERE revoked_at IS NULL"
+    )
+    op.execute("DROP INDEX IF EXISTS ux_refresh_tokens_token_hash")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_refresh_tokens_cleanup "
+        "ON refresh_tokens (expires_at) WHERE revoked_at IS NULL"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_refresh_tokens_cleanup")
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_refresh_tokens_token_hash "
+        "ON refresh_tokens (token_hash)"
+    )
+    op.execute("DROP INDEX IF EXISTS ux_refresh_tokens_active")
@@ -0,0 +1,33 @@
+"""store chat_conversations.combined_text_len as an integer
+
+Revision ID: c8e5f6a7b9d0
+Revises: b7d4e5f6a8c9
+Create Date: 2026-10-15
+
+combined_text_len was a VARCHAR(32) holding a decimal string, so every
+write went through str() and every thread listing int()-parsed it back per
+row. Storing it as INTEGER makes the value round-trip as-is. Rows that do
+not hold a plain number become NULL, which the API already reports as 0.
+"""
+from typing import Sequence, Union
+from alembic import op
+
+
+revision: str = "c8e5f6a7b9d0"
+down_revision: Union[str, None] = "b7d4e5f6a8c9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE chat_conversations ALTER COLUMN combined_text_len TYPE INTEGER "
+        "USING CASE WHEN combined_text_len ~ '^[0-9]{1,9}$' THEN combined_text_len::integer END"
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        "ALTER TABLE chat_conversations ALTER COLUMN combined_text_len TYPE VARCHAR(32) "
+        "USING combined_text_len::text"
+    )
@@ -0,0 +1,49 @@
+"""compress chat_session_sources.content with lz4
+
+Revision ID: d9f6a7b8c0e1
+Revises: c8e5f6a7b9d0
+Create Date: 2026-10-15
+
+Session text (up to tens of KB of extracted documents) is already TOASTed
+and compressed by Postgres, but with the default pglz codec. lz4 compresses
+text to a similar size and decompresses several times faster, which is the
+side that matters here: the corpus is read back on every chat turn.
+
+Column compression needs PostgreSQL 14+ built with lz4 support; other
+servers are left on pglz. Only newly written values use the new codec.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "d9f6a7b8c0e1"
+down_revision: Union[str, None] = "c8e5f6a7b9d0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _supports_column_compression() -> bool:
+    server_version = op.get_bind().dialect.server_version_info or (0,)
+    return server_version >= (14,)
+
+
+def _supports_lz4() -> bool:
+    # lz4 is a build option (--with-lz4); without it SET COMPRESSION lz4
+    # raises FeatureNotSupported and would abort the startup migration.
+    return _supports_column_compression() and op.get_bind().execute(
+        sa.text(
+            "SELECT 1 FROM pg_settings "
+            "WHERE name = 'default_toast_compression' AND 'lz4' = ANY(enumvals)"
+        )
+    ).first() is not None
+
+
+def upgrade() -> None:
+    if _supports_lz4():
+        op.execute("ALTER TABLE chat_session_sources ALTER COLUMN content SET COMPRESSION lz4")
+
+
+def downgrade() -> None:
+    if _supports_column_compression():
+        op.execute("ALTER TABLE chat_session_sources ALTER COLUMN content SET COMPRESSION pglz")
@@ -0,0 +1,40 @@
+"""add composite indexes for oauth provider ids and project documents
+
+Revision ID: e0a7b8c9d1f2
+Revises: d9f6a7b8c0e1
+Create Date: 2026-10-15
+
+  - oauth_accounts (provider, provider_user_id) for provider-id lookups at
+    login
+  - documents (project_id, created_at), replacing the single-column
+    project_id index it supersedes
+"""
+from typing import Sequence, Union
+from alembic import op
+
+
+revision: str = "e0a7b8c9d1f2"
+down_revision: Union[str, None] = "d9f6a7b8c0e1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_oauth_provider_user_id "
+        "ON oauth_accounts (provider, provider_user_id)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_documents_project_created "
+        "ON documents (project_id, created_at)"
+    )
+    op.execute("DROP INDEX IF EXISTS ix_documents_project_id")
+
+
+def downgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_documents_project_id "
+        "ON documents (project_id)"
+    )
+    op.execute("DROP INDEX IF EXISTS ix_documents_project_created")
+    op.execute("DROP INDEX IF EXISTS ix_oauth_provider_user_id")
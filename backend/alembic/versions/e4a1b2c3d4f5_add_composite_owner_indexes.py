@@ -0,0 +1,78 @@
+"""add composite owner/recency indexes
+
+Revision ID: e4a1b2c3d4f5
+Revises: d7e8f9a0b1c2
+Create Date: 2026-10-15
+
+The hot query shapes are "latest conversations for an owner" and
+"messages of a conversation in order". Single-column owner indexes force a
+separate sort step; these compound indexes carry the ordering column so
+the planner can walk the index in order and stop at LIMIT.
+
+  - messages (conversation_id, created_at DESC), replacing the plain
+    conversation_id index
+  - conversations / projects (owner, recency DESC), partial per owner kind
+  - chat_conversations (owner, updated_at DESC), matching the
+    /chat/threads user and anonymous filters
+"""
+from typing import Sequence, Union
+from alembic import op
+
+
+revision: str = "e4a1b2c3d4f5"
+down_revision: Union[str, None] = "d7e8f9a0b1c2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # --- messages ---
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_messages_conv_created "
+        "ON messages (conversation_id, created_at DESC)"
+    )
+    op.execute("DROP INDEX IF EXISTS ix_messages_conversation_id")
+
+    # --- conversations ---
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_conv_user_active "
+        "ON conversations (owner_user_id, updated_at DESC) WHERE owner_user_id IS NOT NULL"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_conv_session_active "
+        "ON conversations (owner_session_id, updated_at DESC) WHERE owner_session_id IS NOT NULL"
+    )
+
+    # --- projects ---
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_projects_user_recent "
+        "ON projects (owner_user_id, created_at DESC) WHERE owner_user_id IS NOT NULL"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_projects_session_recent "
+        "ON projects (owner_session_id, created_at DESC) WHERE owner_session_id IS NOT NULL"
+    )
+
+    # --- chat_conversations (/chat/threads) ---
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_chat_conversations_user_updated "
+        "ON chat_conversations (owner_user_id, updated_at DESC) WHERE owner_user_id IS NOT NULL"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_chat_conversations_anon_updated "
+        "ON chat_conversations (owner_anon_id, updated_at DESC) WHERE owner_user_id IS NULL"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_chat_conversations_anon_updated")
+    op.execute("DROP INDEX IF EXISTS ix_chat_conversations_user_updated")
+    op.execute("DROP INDEX IF EXISTS ix_projects_session_recent")
+    op.execute("DROP INDEX IF EXISTS ix_projects_user_recent")
+    op.execute("DROP INDEX IF EXISTS ix_conv_session_active")
+    op.execute("DROP INDEX IF EXISTS ix_conv_user_active")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_messages_conversation_id "
+        "ON messages (conversation_id)"
+    )
+    op.execute("DROP INDEX IF EXISTS ix_messages_conv_created")
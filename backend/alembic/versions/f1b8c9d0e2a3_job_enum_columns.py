@@ -0,0 +1,43 @@
+"""store jobs.status and jobs.type as Postgres enums
+
+Revision ID: f1b8c9d0e2a3
+Revises: e0a7b8c9d1f2
+Create Date: 2026-10-15
+
+Both columns hold a handful of fixed values. A Postgres enum is stored as a
+4-byte OID instead of a varlena string, so job rows and any index over
+these columns get narrower.
+
+  - job_status: queued, running, done, failed
+  - job_type: process_document
+"""
+from typing import Sequence, Union
+from alembic import op
+
+
+revision: str = "f1b8c9d0e2a3"
+down_revision: Union[str, None] = "e0a7b8c9d1f2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "DO $$ BEGIN "
+        "CREATE TYPE job_status AS ENUM ('queued', 'running', 'done', 'failed'); "
+        "EXCEPTION WHEN duplicate_object THEN NULL; END $$"
+    )
+    op.execute(
+        "DO $$ BEGIN "
+        "CREATE TYPE job_type AS ENUM ('process_document'); "
+        "EXCEPTION WHEN duplicate_object THEN NULL; END $$"
+    )
+    op.execute("ALTER TABLE jobs ALTER COLUMN status TYPE job_status USING status::job_status")
+    op.execute("ALTER TABLE jobs ALTER COLUMN type TYPE job_type USING type::job_type")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE jobs ALTER COLUMN type TYPE VARCHAR(50) USING type::text")
+    op.execute("ALTER TABLE jobs ALTER COLUMN status TYPE VARCHAR(30) USING status::text")
+    op.execute("DROP TYPE IF EXISTS job_type")
+    op.execute("DROP TYPE IF EXISTS job_status")
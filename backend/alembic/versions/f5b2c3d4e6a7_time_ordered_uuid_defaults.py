@@ -0,0 +1,81 @@
+"""time-ordered uuid primary key defaults
+
+Revision ID: f5b2c3d4e6a7
+Revises: e4a1b2c3d4f5
+Create Date: 2026-10-15
+
+Random v4 UUID primary keys scatter inserts across the whole PK (and FK)
+B-tree, splitting leaf pages on insert-heavy tables like messages. A v7
+UUID starts with a millisecond timestamp, so new rows land on the
+rightmost leaf page instead.
+
+uuid_generate_v7() delegates to the built-in uuidv7() on PostgreSQL 18+
+and otherwise overlays the timestamp onto gen_random_uuid() (pgcrypto is
+already installed by the init migration).
+"""
+from typing import Sequence, Union
+from alembic import op
+
+
+revision: str = "f5b2c3d4e6a7"
+down_revision: Union[str, None] = "e4a1b2c3d4f5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+UUID_PK_TABLES = (
+    "users",
+    "oauth_accounts",
+    "refresh_tokens",
+    "projects",
+    "documents",
+    "jobs",
+    "conversations",
+    "messages",
+)
+
+UUID_V7_BUILTIN = """
+CREATE OR REPLACE FUNCTION uuid_generate_v7() RETURNS uuid
+LANGUAGE sql VOLATILE
+AS $$ SELECT uuidv7() $$
+"""
+
+# 48-bit unix-ms timestamp over the first 6 bytes of a v4 uuid, then flip the
+# version nibble from 4 (0100) to 7 (0111). The variant bits are already set.
+UUID_V7_FALLBACK = """
+CREATE OR REPLACE FUNCTION uuid_generate_v7() RETURNS uuid
+LANGUAGE plpgsql VOLATILE
+AS $$
+BEGIN
+    RETURN encode(
+        set_bit(
+            set_bit(
+                overlay(
+                    uuid_send(gen_random_uuid())
+                    PLACING substring(int8send(floor(extract(epoch FROM clock_timestamp()) * 1000)::bigint) FROM 3)
+                    FROM 1 FOR 6
+                ),
+                52, 1
+            ),
+            53, 1
+        ),
+        'hex'
+    )::uuid;
+END
+$$
+"""
+
+
+def upgrade() -> None:
+    server_version = op.get_bind().dialect.server_version_info or (0,)
+    op.execute(UUID_V7_BUILTIN if server_version >= (18,) else UUID_V7_FALLBACK)
+
+    for table in UUID_PK_TABLES:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT uuid_generate_v7()")
+
+
+def downgrade() -> None:
+    for table in UUID_PK_TABLES:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT gen_random_uuid()")
+
+    op.execute("DROP FUNCTION IF EXISTS uuid_generate_v7()")
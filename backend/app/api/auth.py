@@ -1,23 +1,22 @@
 from __future__ import annotations
 
-import os
 from datetime import datetime, timedelta, timezone
 
 from fastapi import APIRouter, Request, HTTPException, Depends, Response
 from jose import JWTError, jwt
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from app.db.session import get_db
+from app.core.config import settings
+from app.db.session import DbDep, get_db_ro
 from app.core.security.auth_service import (
     login_with_google as login_with_google_service,
     create_access_token,
     create_refresh_token,
-    JWT_SECRET,
-    JWT_ALGORITHM,
 )
 from app.models.user import User
-from app.models.oauth_account import OAuthAccount
 
 router = APIRouter(tags=["auth"])
 
@@ -47,13 +46,9 @@ class LoginResponse(BaseModel):
 # Helpers
 # ---------------------------
 
-def _get_jwt_secret() -> str:
-    return os.getenv("JWT_SECRET", os.getenv("APP_SECRET", "dev_secret_change_me"))
-
-
 def _decode_token(token: str) -> dict:
     try:
-        return jwt.decode(token, _get_jwt_secret(), algorithms=[JWT_ALGORITHM])
+        return jwt.decode(token, settings.jwt_secret, algorithms=[settings.JWT_ALGORITHM])
     except JWTError as e:
         raise HTTPException(status_code=401, detail=f"Invalid token: {e}")
 
@@ -65,19 +60,28 @@ def _extract_bearer(request: Request) -> str | None:
     return None
 
 
-def _user_from_token(token: str, db: Session) -> User:
+async def _user_from_token(token: str, db: AsyncSession) -> User:
     payload = _decode_token(token)
     sub = payload.get("sub")
     if not sub:
         raise HTTPException(status_code=401, detail="Token missing sub claim.")
-    user = db.query(User).filter(User.id == sub).first()
+    user = await _query_user_with_accounts(db, sub)
     if not user:
         raise HTTPException(status_code=401, detail="User not found.")
     return user
 
 
-def _email_for_user(user_id, db: Session) -> str | None:
-    oauth = db.query(OAuthAccount).filter(OAuthAccount.user_id == user_id).first()
+async def _query_user_with_accounts(db: AsyncSession, user_id) -> User | None:
+    # Pull the user's oauth accounts in the same load (one IN query) instead of
+    # a separate lookup per user; lazy loads can't run under an AsyncSession.
+    result = await db.execute(
+        select(User).options(selectinload(User.oauth_accounts)).where(User.id == user_id)
+    )
+    return result.scalars().first()
+
+
+def _email_for_user(user: User) -> str | None:
+    oauth = user.oauth_accounts[0] if user.oauth_accounts else None
     return oauth.email_at_auth if oauth else None
 
 
@@ -90,14 +94,14 @@ async def login_with_google(
     payload: GoogleLoginRequest,
     request: Request,
     response: Response,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(DbDep()),
 ):
     """
     Google Sign-In using ID token from frontend (GIS button).
     Verifies the token, upserts user, issues JWT access + refresh tokens.
     """
     try:
-        result = login_with_google_service(
+        result = await login_with_google_service(
             db=db,
             id_token=payload.id_token,
             session_id=request.cookies.get("pu_session_id"),
@@ -134,14 +138,14 @@ async def login_with_google(
 
 
 @router.get("/auth/me", response_model=UserOut)
-async def me(request: Request, db: Session = Depends(get_db)):
+async def me(request: Request, db: AsyncSession = Depends(get_db_ro)):
     """Return profile for the authenticated user."""
     token = _extract_bearer(request)
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated.")
 
-    user = _user_from_token(token, db)
-    email = _email_for_user(user.id, db)
+    user = await _user_from_token(token, db)
+    email = _email_for_user(user)
 
     return UserOut(
         id=str(user.id),
@@ -152,7 +156,7 @@ async def me(request: Request, db: Session = Depends(get_db)):
 
 
 @router.post("/auth/refresh")
-async def refresh(request: Request, response: Response, db: Session = Depends(get_db)):
+async def refresh(request: Request, response: Response, db: AsyncSession = Depends(DbDep())):
     """Issue a new access token using the HttpOnly refresh token cookie."""
     refresh_token = request.cookies.get("pu_refresh_token")
     if not refresh_token:
@@ -168,7 +172,7 @@ async def refresh(request: Request, response: Response, db: Session = Depends(ge
     if not sub:
         raise HTTPException(status_code=401, detail="Token missing sub.")
 
-    user = db.query(User).filter(User.id == sub).first()
+    user = await _query_user_with_accounts(db, sub)
     if not user:
         raise HTTPException(status_code=401, detail="User not found.")
 
@@ -186,7 +190,7 @@ async def refresh(request: Request, response: Response, db: Session = Depends(ge
         path="/",
     )
 
-    email = _email_for_user(user.id, db)
+    email = _email_for_user(user)
 
     return {
         "access_token": new_access,
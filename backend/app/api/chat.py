@@ -1,37 +1,81 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import logging
 import os
+import threading
+import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timezone
 from typing import Any, Literal, Optional
 
+import orjson
 from fastapi import APIRouter, HTTPException, Request, Query
 from jose import JWTError, jwt
-from openai import OpenAI
+from openai import AsyncOpenAI
 from pydantic import BaseModel, Field
-from sqlalchemy import JSON, Column, DateTime, MetaData, String, Table, Text, create_engine, select
+from sqlalchemy import JSON, Column, DateTime, Integer, MetaData, String, Table, Text, case, create_engine, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.config import settings
 
 router = APIRouter()
+logger = logging.getLogger("prepareup.chat")
 
 
 # ---------------------------
 # OpenAI client getter
 # ---------------------------
-def _get_client() -> OpenAI:
-    api_key = os.getenv("OPENAI_API_KEY")
+_CLIENT: AsyncOpenAI | None = None
+
+
+def _get_client() -> AsyncOpenAI:
+    # The client owns an HTTP connection pool, so build it once and reuse it.
+    global _CLIENT
+    if _CLIENT is not None:
+        return _CLIENT
+    api_key = settings.OPENAI_API_KEY
     if not api_key:
         raise HTTPException(status_code=500, detail="OPENAI_API_KEY is not set in the backend environment.")
-    return OpenAI(api_key=api_key)
+    _CLIENT = AsyncOpenAI(api_key=api_key)
+    return _CLIENT
+
+
+# ---------------------------
+# Prompt constants
+# ---------------------------
+_SYSTEM_PROMPT = (
+    "You are Prepare-Up, a study assistant. The user's uploaded DOCUMENTS are the primary source and the topic boundary. "
+    "Answer questions in a way that directly helps the user understand, study, or work with the DOCUMENTS and any generated outputs (study guide/flashcards/podcast/script). "
+    "\n\n"
+    "Rules:\n"
+    "1) Prefer DOCUMENTS first: when the answer is present in the DOCUMENTS, answer ONLY from them.\n"
+    "2) Limited outside knowledge is allowed ONLY to clarify, define, or give helpful context for something that is already in the DOCUMENTS (e.g., define a term, explain a concept, provide an example).\n"
+    "3) If you use outside/general knowledge, label it clearly with 'General knowledge:' and keep it brief.\n"
+    "4) Do NOT go off-topic: if the user's question is unrelated to the DOCUMENTS, refuse and say: 'That seems unrelated to your uploaded documents. Ask about the documents or upload relevant material.'\n"
+    "5) If the answer cannot be found in the DOCUMENTS and outside knowledge would be speculative or unsafe, say: 'I can't find that in your uploaded documents.' and suggest what to upload or what to clarify.\n"
+    "6) When the user asks to modify a previous output (study guide/flashcards/podcast/script), apply the modification but keep it faithful to the DOCUMENTS; any additions beyond the documents must be explicitly labeled as General knowledge."
+)
+_SYSTEM_MESSAGE = {"role": "system", "content": _SYSTEM_PROMPT}
+_RESPONSE_FORMAT = {"type": "json_object"}
+# Client-side turn roles -> OpenAI chat roles
+_ROLE_MAP = {"ai": "assistant", "user": "user"}
 
 
 # ---------------------------
 # DB persistence
 # ---------------------------
 # Requires DATABASE_URL, e.g. postgresql+psycopg://user:pass@db:5432/prepareup
-DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_URL = settings.DATABASE_URL
 _ENGINE = None
 _METADATA = MetaData()
+# Rows per executemany call for bulk message writes (Postgres throughput plateaus around here).
+_INSERT_BATCH_SIZE = 1000
+# (session_id, max_chars) -> (updated_at, text), least recently used first.
+_SESSION_CACHE: OrderedDict[tuple[str, Optional[int]], tuple[datetime, str]] = OrderedDict()
+_SESSION_CACHE_LOCK = threading.Lock()
+_SESSION_CACHE_SIZE = 128
 
 conversations = Table(
     "chat_conversations",
@@ -44,7 +88,7 @@ conversations = Table(
     # Source metadata needed to reopen a saved thread.
     Column("source_session_id", String(128), nullable=True),
     Column("source_files", JSON, nullable=True),
-    Column("combined_text_len", String(32), nullable=True),
+    Column("combined_text_len", Integer, nullable=True),
     Column("created_at", DateTime(timezone=True), nullable=False),
     Column("updated_at", DateTime(timezone=True), nullable=False),
 )
@@ -78,7 +122,9 @@ def _get_engine():
         return _ENGINE
     if not DATABASE_URL:
         return None
-    _ENGINE = create_engine(DATABASE_URL, pool_pre_ping=True)
+    from app.db.session import ENGINE_OPTIONS
+
+    _ENGINE = create_engine(DATABASE_URL, **ENGINE_OPTIONS)
     _METADATA.create_all(_ENGINE)
     return _ENGINE
 
@@ -100,12 +146,17 @@ def _now() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def _jwt_secret() -> str:
-    return os.getenv("JWT_SECRET", os.getenv("APP_SECRET", "dev_secret_change_me"))
-
+def _uuid7() -> str:
+    """Time-ordered (v7) UUID string: 48-bit unix ms, then random bits.
 
-def _jwt_alg() -> str:
-    return os.getenv("JWT_ALGORITHM", "HS256")
+    The chat tables key on these strings, so new messages and conversations
+    land at the right edge of their primary-key indexes instead of random
+    leaf pages (the hex form sorts in timestamp order too).
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # version 7
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # RFC 4122 variant
+    return str(uuid.UUID(int=value))
 
 
 def _extract_bearer_token(request: Request) -> str | None:
@@ -123,7 +174,7 @@ def _extract_bearer_token(request: Request) -> str | None:
 
 def _try_decode(token: str) -> dict[str, Any]:
     try:
-        return jwt.decode(token, _jwt_secret(), algorithms=[_jwt_alg()])
+        return jwt.decode(token, settings.jwt_secret, algorithms=[settings.JWT_ALGORITHM])
     except JWTError:
         return {}
 
@@ -172,7 +223,7 @@ def _ensure_conversation(
                     owner_anon_id=owner_anon_id,
                     source_session_id=source_session_id,
                     source_files=source_files,
-                    combined_text_len=str(combined_text_len) if combined_text_len is not None else None,
+                    combined_text_len=combined_text_len,
                     created_at=now,
                     updated_at=now,
                 )
@@ -190,7 +241,7 @@ def _ensure_conversation(
             if source_files is not None:
                 values["source_files"] = source_files
             if combined_text_len is not None:
-                values["combined_text_len"] = str(combined_text_len)
+                values["combined_text_len"] = combined_text_len
 
             conn.execute(
                 conversations.update().where(conversations.c.id == conversation_id).values(**values)
@@ -208,7 +259,7 @@ def _insert_message(
     with engine.begin() as conn:
         conn.execute(
             messages_tbl.insert().values(
-                id=str(uuid.uuid4()),
+                id=_uuid7(),
                 conversation_id=conversation_id,
                 role=role,
                 content=content,
@@ -223,23 +274,24 @@ def _insert_message(
 
 def _replace_messages(engine, conversation_id: str, messages: list[dict[str, Any]]):
     now = _now()
+    rows = [
+        {
+            "id": _uuid7(),
+            "conversation_id": conversation_id,
+            "role": role,
+            "content": content,
+            "meta": {"source": "sync"},
+            "created_at": now,
+        }
+        for m in messages
+        if (content := str(m.get("content") or "").strip())
+        and (role := str(m.get("role") or "").strip()) in ("user", "ai")
+    ]
     with engine.begin() as conn:
         conn.execute(messages_tbl.delete().where(messages_tbl.c.conversation_id == conversation_id))
-        for m in messages:
-            content = str(m.get("content") or "").strip()
-            role = str(m.get("role") or "").strip()
-            if not content or role not in ("user", "ai"):
-                continue
-            conn.execute(
-                messages_tbl.insert().values(
-                    id=str(uuid.uuid4()),
-                    conversation_id=conversation_id,
-                    role=role,
-                    content=content,
-                    meta={"source": "sync"},
-                    created_at=now,
-                )
-            )
+        # One executemany round trip per batch instead of one INSERT per message.
+        for start in range(0, len(rows), _INSERT_BATCH_SIZE):
+            conn.execute(messages_tbl.insert(), rows[start:start + _INSERT_BATCH_SIZE])
         conn.execute(
             conversations.update().where(conversations.c.id == conversation_id).values(updated_at=now)
         )
@@ -252,49 +304,71 @@ def _store_session_text(
     owner_anon_id: Optional[str],
 ):
     now = _now()
+    # Single-statement upsert: no existence SELECT round trip before the write.
+    stmt = pg_insert(session_sources).values(
+        session_id=session_id,
+        owner_user_id=owner_user_id,
+        owner_anon_id=owner_anon_id,
+        content=content,
+        created_at=now,
+        updated_at=now,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[session_sources.c.session_id],
+        set_={
+            "owner_user_id": stmt.excluded.owner_user_id,
+            "owner_anon_id": stmt.excluded.owner_anon_id,
+            "content": stmt.excluded.content,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
     with engine.begin() as conn:
-        existing = conn.execute(
-            select(session_sources.c.session_id).where(session_sources.c.session_id == session_id)
-        ).first()
+        conn.execute(stmt)
 
-        values = {
-            "owner_user_id": owner_user_id,
-            "owner_anon_id": owner_anon_id,
-            "content": content,
-            "updated_at": now,
-        }
 
-        if existing is None:
-            conn.execute(
-                session_sources.insert().values(
-                    session_id=session_id,
-                    owner_user_id=owner_user_id,
-                    owner_anon_id=owner_anon_id,
-                    content=content,
-                    created_at=now,
-                    updated_at=now,
-                )
-            )
-        else:
-            conn.execute(
-                session_sources.update()
-                .where(session_sources.c.session_id == session_id)
-                .values(**values)
-            )
+def _read_session_text(session_id: str, max_chars: Optional[int] = None) -> str:
+    """Return the stored session text, stripped; raise 404 if missing or empty.
 
+    When ``max_chars`` is given the text is truncated by the database, so only
+    the prefix the caller will actually use is transferred and decoded.
 
-def _read_session_text(session_id: str) -> str:
+    Recently read texts are kept in a small LRU keyed by ``(session_id,
+    max_chars)``. Each read still checks ``updated_at`` with the database, but
+    while it matches the cached copy the content column is not sent back.
+    """
     engine = _require_engine()
+    key = (session_id, max_chars)
+    with _SESSION_CACHE_LOCK:
+        cached = _SESSION_CACHE.get(key)
+
+    content = session_sources.c.content
+    if max_chars is not None:
+        content = func.substr(content, 1, max_chars)
+    if cached is not None:
+        content = case((session_sources.c.updated_at == cached[0], None), else_=content)
 
     with engine.begin() as conn:
         row = conn.execute(
-            select(session_sources.c.content).where(session_sources.c.session_id == session_id)
-        ).mappings().first()
+            select(session_sources.c.updated_at, content.label("content"))
+            .where(session_sources.c.session_id == session_id)
+        ).first()
 
-    if row is None:
-        raise HTTPException(status_code=404, detail="Session not found or expired.")
+    if row is not None and row.content is None and cached is not None and row.updated_at == cached[0]:
+        with _SESSION_CACHE_LOCK:
+            if key in _SESSION_CACHE:
+                _SESSION_CACHE.move_to_end(key)
+        return cached[1]
+
+    content = (row.content or "").strip() if row is not None else ""
+    with _SESSION_CACHE_LOCK:
+        if not content:
+            _SESSION_CACHE.pop(key, None)
+        else:
+            _SESSION_CACHE[key] = (row.updated_at, content)
+            _SESSION_CACHE.move_to_end(key)
+            while len(_SESSION_CACHE) > _SESSION_CACHE_SIZE:
+                _SESSION_CACHE.popitem(last=False)
 
-    content = str(row.get("content") or "").strip()
     if not content:
         raise HTTPException(status_code=404, detail="Session not found or expired.")
 
@@ -385,24 +459,22 @@ class ChatSyncRequest(BaseModel):
 
 
 @router.post("/chat")
-def chat(req: ChatRequest, request: Request):
-    corpus = _read_session_text(req.session_id).strip()
-    if not corpus:
-        raise HTTPException(status_code=400, detail="No extracted text available for this session.")
-
-    corpus = corpus[:60_000]
+async def chat(req: ChatRequest, request: Request):
+    # DB work runs in worker threads; the model call is awaited on the event loop.
+    corpus = await asyncio.to_thread(_read_session_text, req.session_id, max_chars=60_000)
 
     history = req.history or []
     history = [t for t in history if getattr(t, "role", None) in ("user", "ai") and getattr(t, "content", "").strip()]
     history = history[-12:]
 
     engine = _require_engine()
-    conversation_id = (req.thread_id or "").strip() or str(uuid.uuid4())
+    conversation_id = (req.thread_id or "").strip() or _uuid7()
     title = (req.thread_title or "").strip() or None
 
     owner_user_id, owner_anon_id = _require_owner(request)
 
-    _ensure_conversation(
+    await asyncio.to_thread(
+        _ensure_conversation,
         engine,
         conversation_id,
         title,
@@ -413,23 +485,12 @@ def chat(req: ChatRequest, request: Request):
         combined_text_len=len(corpus),
     )
 
-    _insert_message(engine, conversation_id, role="user", content=req.message, meta={"source": "dashboard"})
-
-    system_prompt = (
-        "You are Prepare-Up, a study assistant. The user's uploaded DOCUMENTS are the primary source and the topic boundary. "
-        "Answer questions in a way that directly helps the user understand, study, or work with the DOCUMENTS and any generated outputs (study guide/flashcards/podcast/script). "
-        "\n\n"
-        "Rules:\n"
-        "1) Prefer DOCUMENTS first: when the answer is present in the DOCUMENTS, answer ONLY from them.\n"
-        "2) Limited outside knowledge is allowed ONLY to clarify, define, or give helpful context for something that is already in the DOCUMENTS (e.g., define a term, explain a concept, provide an example).\n"
-        "3) If you use outside/general knowledge, label it clearly with 'General knowledge:' and keep it brief.\n"
-        "4) Do NOT go off-topic: if the user's question is unrelated to the DOCUMENTS, refuse and say: 'That seems unrelated to your uploaded documents. Ask about the documents or upload relevant material.'\n"
-        "5) If the answer cannot be found in the DOCUMENTS and outside knowledge would be speculative or unsafe, say: 'I can't find that in your uploaded documents.' and suggest what to upload or what to clarify.\n"
-        "6) When the user asks to modify a previous output (study guide/flashcards/podcast/script), apply the modification but keep it faithful to the DOCUMENTS; any additions beyond the documents must be explicitly labeled as General knowledge."
+    await asyncio.to_thread(
+        _insert_message, engine, conversation_id, role="user", content=req.message, meta={"source": "dashboard"}
     )
 
     input_messages: list[dict[str, str]] = [
-        {"role": "system", "content": system_prompt},
+        _SYSTEM_MESSAGE,
         {
             "role": "user",
             "content": (
@@ -442,27 +503,18 @@ def chat(req: ChatRequest, request: Request):
         },
     ]
 
-    for t in history:
-        input_messages.append(
-            {
-                "role": "assistant" if t.role == "ai" else "user",
-                "content": t.content,
-            }
-        )
-
+    input_messages += [{"role": _ROLE_MAP[t.role], "content": t.content} for t in history]
     input_messages.append({"role": "user", "content": req.message})
 
-    model_name = os.getenv("OPENAI_CHAT_MODEL", os.getenv("OPENAI_MODEL", "gpt-4o-mini"))
-
-    resp = _get_client().chat.completions.create(
-        model=model_name,
+    resp = await _get_client().chat.completions.create(
+        model=settings.chat_model,
         messages=input_messages,
-        response_format={"type": "json_object"},
+        response_format=_RESPONSE_FORMAT,
     )
 
     content = (resp.choices[0].message.content or "").strip()
     try:
-        payload = json.loads(content)
+        payload = orjson.loads(content)
     except Exception:
         raise HTTPException(status_code=502, detail=f"Model returned invalid JSON: {content[:500]}")
 
@@ -479,7 +531,9 @@ def chat(req: ChatRequest, request: Request):
     if not answer:
         raise HTTPException(status_code=502, detail="Model returned empty answer.")
 
-    _insert_message(engine, conversation_id, role="ai", content=answer, meta={"model": model_name})
+    await asyncio.to_thread(
+        _insert_message, engine, conversation_id, role="ai", content=answer, meta={"model": settings.chat_model}
+    )
 
     payload["thread_id"] = conversation_id
     return payload
@@ -529,7 +583,7 @@ def list_threads(
                 "updated_at": r.updated_at.isoformat(),
                 "source_session_id": r.source_session_id, 
                 "source_files": r.source_files or [],
-                "combined_text_len": int(r.combined_text_len) if r.combined_text_len not in (None, "") else 0,
+                "combined_text_len": r.combined_text_len or 0,
             }
             for r in rows
         ]
@@ -587,7 +641,7 @@ def get_thread(thread_id: str, request: Request):
             "title": convo["title"],
             "source_session_id": convo["source_session_id"],
             "source_files": convo["source_files"] or [],
-            "combined_text_len": int(convo["combined_text_len"]) if convo["combined_text_len"] not in (None, "") else 0,
+            "combined_text_len": convo["combined_text_len"] or 0,
             "created_at": convo["created_at"],
             "updated_at": convo["updated_at"],
         },
@@ -635,11 +689,12 @@ def claim(request: Request):
 
 @router.post("/chat/sync")
 def sync_chat(req: ChatSyncRequest, request: Request):
-    _ = _read_session_text(req.session_id).strip()
+    # Existence check only; the first character is enough to tell a session is non-empty.
+    _ = _read_session_text(req.session_id, max_chars=1)
 
     engine = _require_engine()
 
-    conversation_id = (req.thread_id or "").strip() or str(uuid.uuid4())
+    conversation_id = (req.thread_id or "").strip() or _uuid7()
     title = (req.thread_title or "").strip() or None
 
     owner_user_id, owner_anon_id = _require_owner(request)
@@ -1,14 +1,19 @@
 import asyncio
-import os
+import logging
 import secrets
 from typing import Any, Dict, Optional
 from urllib.parse import urlencode
 
 import httpx
+import orjson
+from cachetools import TTLCache
 from fastapi import APIRouter, HTTPException, Request, Query
-from fastapi.responses import RedirectResponse, JSONResponse
+from fastapi.responses import RedirectResponse, ORJSONResponse, StreamingResponse
 
-router = APIRouter()
+from app.core.config import settings
+
+router = APIRouter(default_response_class=ORJSONResponse)
+logger = logging.getLogger("prepareup.discord")
 
 DISCORD_AUTH_BASE = "https://discord.com/oauth2/authorize"
 DISCORD_TOKEN_URL = "https://discord.com/api/oauth2/token"
@@ -16,6 +21,31 @@ DISCORD_API_BASE = "https://discord.com/api"
 DISCORD_API_V10 = "https://discord.com/api/v10"
 
 
+# One pooled client for all Discord calls so keep-alive connections (and the
+# TLS handshake) are reused across requests. Closed on app shutdown.
+_DISCORD_CLIENT = httpx.AsyncClient(
+    http2=True,
+    timeout=20,
+    limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+)
+
+
+async def close_discord_client() -> None:
+    await _DISCORD_CLIENT.aclose()
+
+
+router.add_event_handler("shutdown", close_discord_client)
+
+
+# Short-lived cache for user-scoped Discord GETs. Profile and guild lists change
+# rarely, and every miss costs a round trip plus Discord rate-limit budget.
+_API_CACHE: TTLCache = TTLCache(maxsize=4096, ttl=30)
+_GUILDS_CACHE: TTLCache = TTLCache(maxsize=4096, ttl=60)
+
+# Keep text (0) + announcement (5) channels only
+_TEXT_CHANNEL_TYPES = frozenset({0, 5})
+
+
 # Discord permission bit(s)
 MANAGE_GUILD = 0x20  # "Manage Server"
 
@@ -29,32 +59,31 @@ def _can_manage_guild(permissions: Any) -> bool:
     return (p & MANAGE_GUILD) == MANAGE_GUILD
 
 
-def _env(name: str, default: Optional[str] = None) -> str:
-    v = os.getenv(name, default)
-    if v is None:
+def _required(value: Optional[str], name: str) -> str:
+    if value is None:
         raise RuntimeError(f"Missing required env var: {name}")
-    return v
+    return value
 
 
 def _frontend_base() -> str:
-    return os.getenv("FRONTEND_BASE_URL", "http://localhost:3000").rstrip("/")
+    return settings.FRONTEND_BASE_URL.rstrip("/")
 
 
 def _redirect_uri() -> str:
     # Must match the Discord Developer Portal redirect exactly
-    return _env("DISCORD_REDIRECT_URI", "http://localhost:8000/api/auth/discord/callback")
+    return settings.DISCORD_REDIRECT_URI
 
 
 def _client_id() -> str:
-    return _env("DISCORD_CLIENT_ID")
+    return _required(settings.DISCORD_CLIENT_ID, "DISCORD_CLIENT_ID")
 
 
 def _client_secret() -> str:
-    return _env("DISCORD_CLIENT_SECRET")
+    return _required(settings.DISCORD_CLIENT_SECRET, "DISCORD_CLIENT_SECRET")
 
 
 def _bot_token() -> str:
-    return _env("DISCORD_BOT_TOKEN")
+    return _required(settings.DISCORD_BOT_TOKEN, "DISCORD_BOT_TOKEN")
 
 
 def _bot_headers() -> Dict[str, str]:
@@ -63,8 +92,7 @@ def _bot_headers() -> Dict[str, str]:
 
 async def _bot_is_in_guild(guild_id: str) -> bool:
     """Return True if the bot token can access the guild (meaning the bot is installed)."""
-    async with httpx.AsyncClient(timeout=20) as client:
-        resp = await client.get(f"{DISCORD_API_V10}/guilds/{guild_id}", headers=_bot_headers())
+    resp = await _DISCORD_CLIENT.get(f"{DISCORD_API_V10}/guilds/{guild_id}", headers=_bot_headers())
     if resp.status_code == 200:
         return True
     # If the bot isn't in the server, Discord typically returns 404 (Unknown Guild) or 403.
@@ -113,30 +141,29 @@ async def _guild_with_bot_status(g: Dict[str, Any]) -> Dict[str, Any]:
 async def _post_form_with_retries(url: str, data: Dict[str, Any], headers: Dict[str, str], *, max_retries: int = 5):
     """POST x-www-form-urlencoded with basic retry/backoff for Discord rate limits."""
     backoff = 1.0
-    async with httpx.AsyncClient(timeout=20) as client:
-        for attempt in range(max_retries):
-            resp = await client.post(url, data=data, headers=headers)
+    for attempt in range(max_retries):
+        resp = await _DISCORD_CLIENT.post(url, data=data, headers=headers)
+
+        # Discord sometimes returns 429 with Retry-After
+        if resp.status_code == 429:
+            retry_after = resp.headers.get("Retry-After")
+            try:
+                wait_s = float(retry_after) if retry_after is not None else backoff
+            except ValueError:
+                wait_s = backoff
+            await asyncio.sleep(min(wait_s, 15.0))
+            backoff = min(backoff * 2.0, 10.0)
+            continue
 
-            # Discord sometimes returns 429 with Retry-After
-            if resp.status_code == 429:
-                retry_after = resp.headers.get("Retry-After")
-                try:
-                    wait_s = float(retry_after) if retry_after is not None else backoff
-                except ValueError:
-                    wait_s = backoff
-                await asyncio.sleep(min(wait_s, 15.0))
+        # Sometimes token endpoint returns 400 invalid_request with a rate limit message
+        if resp.status_code == 400:
+            txt = resp.text or ""
+            if "rate limited" in txt.lower() or "too many tokens" in txt.lower():
+                await asyncio.sleep(min(backoff, 10.0))
                 backoff = min(backoff * 2.0, 10.0)
                 continue
 
-            # Sometimes token endpoint returns 400 invalid_request with a rate limit message
-            if resp.status_code == 400:
-                txt = resp.text or ""
-                if "rate limited" in txt.lower() or "too many tokens" in txt.lower():
-                    await asyncio.sleep(min(backoff, 10.0))
-                    backoff = min(backoff * 2.0, 10.0)
-                    continue
-
-            return resp
+        return resp
 
     return resp
 
@@ -203,7 +230,7 @@ async def discord_callback(
     if resp.status_code >= 400:
         # Avoid showing raw JSON in the browser; send user back with an error flag
         return RedirectResponse(f"{_frontend_base()}/dashboard?discord=error", status_code=302)
-    token = resp.json()
+    token = orjson.loads(resp.content)
 
     sess["discord"] = {
         "access_token": token.get("access_token"),
@@ -221,24 +248,33 @@ async def discord_callback(
 async def discord_status(request: Request):
     sess = _get_session(request)
     connected = bool((sess.get("discord") or {}).get("access_token"))
-    return JSONResponse({"connected": connected})
+    return ORJSONResponse({"connected": connected})
 
 
 @router.post("/discord/logout")
 async def discord_logout(request: Request):
     sess = _get_session(request)
     sess.pop("discord", None)
-    return JSONResponse({"ok": True})
+    return ORJSONResponse({"ok": True})
 
 
 async def _discord_api_get(access_token: str, path: str):
+    """GET a user-scoped Discord endpoint, memoized per (token, path) for a short TTL."""
+    cache = _GUILDS_CACHE if path == "/users/@me/guilds" else _API_CACHE
+    key = (access_token, path)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
     url = f"{DISCORD_API_BASE}{path}"
     headers = {"Authorization": f"Bearer {access_token}"}
-    async with httpx.AsyncClient(timeout=20) as client:
-        resp = await client.get(url, headers=headers)
-        if resp.status_code >= 400:
-            raise HTTPException(status_code=resp.status_code, detail=resp.text)
-        return resp.json()
+    resp = await _DISCORD_CLIENT.get(url, headers=headers)
+    if resp.status_code >= 400:
+        raise HTTPException(status_code=resp.status_code, detail=resp.text)
+    data = orjson.loads(resp.content)
+
+    cache[key] = data
+    return data
 
 
 @router.get("/discord/me")
@@ -250,31 +286,32 @@ async def discord_me(request: Request):
     return await _discord_api_get(access, "/users/@me")
 
 
-@router.get("/discord/guilds")
-async def discord_guilds(request: Request):
-    sess = _get_session(request)
-    access = (sess.get("discord") or {}).get("access_token")
-    if not access:
-        raise HTTPException(status_code=401, detail="Discord not connected")
-
-    guilds = await _discord_api_get(access, "/users/@me/guilds")
-
-    # Fetch bot's guild list in a SINGLE call instead of one call per user-guild (N+1 fix).
-    bot_guild_ids: set[str] = set()
+async def _bot_guild_ids() -> set[str]:
+    """Return the ids of every guild the bot is in, from a single bot-token call."""
     try:
-        async with httpx.AsyncClient(timeout=20) as client:
-            bot_resp = await client.get(
-                f"{DISCORD_API_V10}/users/@me/guilds",
-                headers=_bot_headers(),
-                params={"limit": 200},
-            )
+        bot_resp = await _DISCORD_CLIENT.get(
+            f"{DISCORD_API_V10}/users/@me/guilds",
+            headers=_bot_headers(),
+            params={"limit": 200},
+        )
         if bot_resp.status_code == 200:
-            bot_guild_ids = {str(g["id"]) for g in (bot_resp.json() or [])}
+            return {str(g["id"]) for g in (orjson.loads(bot_resp.content) or [])}
     except Exception:
         pass  # If bot guild fetch fails, just show all as "not installed"
+    return set()
+
+
+async def _simplified_guilds(access_token: str) -> list[Dict[str, Any]]:
+    """Return the user's guilds with bot install status, installed/manageable first."""
+    # The user's guild list and the bot's guild list are independent, so fetch
+    # them concurrently (multiplexed over the shared HTTP/2 connection).
+    guilds, bot_guild_ids = await asyncio.gather(
+        _discord_api_get(access_token, "/users/@me/guilds"),
+        _bot_guild_ids(),
+    )
 
     simplified = []
-    for g in (guilds or []):
+    for g in guilds or ():
         guild_id = str(g.get("id") or "")
         perms = g.get("permissions")
         is_owner = bool(g.get("owner"))
@@ -305,7 +342,32 @@ async def discord_guilds(request: Request):
             (g.get("name") or "").lower(),
         )
     )
-    return JSONResponse({"guilds": simplified})
+    return simplified
+
+
+@router.get("/discord/guilds")
+async def discord_guilds(request: Request):
+    sess = _get_session(request)
+    access = (sess.get("discord") or {}).get("access_token")
+    if not access:
+        raise HTTPException(status_code=401, detail="Discord not connected")
+
+    return ORJSONResponse({"guilds": await _simplified_guilds(access)})
+
+
+@router.get("/discord/overview")
+async def discord_overview(request: Request):
+    """Return the Discord user and their guilds in one response for the dashboard."""
+    sess = _get_session(request)
+    access = (sess.get("discord") or {}).get("access_token")
+    if not access:
+        raise HTTPException(status_code=401, detail="Discord not connected")
+
+    me, guilds = await asyncio.gather(
+        _discord_api_get(access, "/users/@me"),
+        _simplified_guilds(access),
+    )
+    return ORJSONResponse({"me": me, "guilds": guilds})
 
 
 @router.get("/discord/bot/install-url")
@@ -313,7 +375,7 @@ async def discord_bot_install_url():
     """Returns a URL that lets the user add the PrepareUp bot to a server."""
     client_id = _client_id()
     # Minimal read access: View Channels (1024) + Read Message History (65536) = 66560
-    permissions = int(os.getenv("DISCORD_BOT_PERMISSIONS", "66560"))
+    permissions = settings.DISCORD_BOT_PERMISSIONS
     scopes = "bot applications.commands"
 
     params = {
@@ -322,14 +384,14 @@ async def discord_bot_install_url():
         "scope": scopes,
         "disable_guild_select": "false",
     }
-    return JSONResponse({"url": f"{DISCORD_AUTH_BASE}?{urlencode(params)}"})
+    return ORJSONResponse({"url": f"{DISCORD_AUTH_BASE}?{urlencode(params)}"})
 
 
 @router.get("/discord/bot/guilds/{guild_id}/installed")
 async def discord_bot_installed(guild_id: str):
     """Returns whether the bot is currently installed in the given guild."""
     installed = await _bot_is_in_guild(guild_id)
-    return JSONResponse({"guild_id": guild_id, "installed": installed})
+    return ORJSONResponse({"guild_id": guild_id, "installed": installed})
 
 
 @router.get("/discord/bot/request-install")
@@ -349,7 +411,7 @@ async def discord_bot_request_install(
 
     # Reuse the same invite URL your UI uses for install
     client_id = _client_id()
-    permissions = int(os.getenv("DISCORD_BOT_PERMISSIONS", "66560"))
+    permissions = settings.DISCORD_BOT_PERMISSIONS
     scopes = "bot applications.commands"
     invite_url = f"{DISCORD_AUTH_BASE}?{urlencode({'client_id': client_id, 'permissions': str(permissions), 'scope': scopes, 'disable_guild_select': 'false'})}"
 
@@ -361,23 +423,21 @@ async def discord_bot_request_install(
         "After installing, return to PrepareUp to finish setup."
     )
 
-    return JSONResponse({"invite_url": invite_url, "message": message})
+    return ORJSONResponse({"invite_url": invite_url, "message": message})
 
 
 @router.get("/discord/bot/guilds/{guild_id}/channels")
 async def discord_bot_list_channels(guild_id: str):
     """Lists channels in a guild that the bot can see."""
-    async with httpx.AsyncClient(timeout=20) as client:
-        resp = await client.get(f"{DISCORD_API_V10}/guilds/{guild_id}/channels", headers=_bot_headers())
+    resp = await _DISCORD_CLIENT.get(f"{DISCORD_API_V10}/guilds/{guild_id}/channels", headers=_bot_headers())
 
     if resp.status_code == 429:
         raise HTTPException(status_code=429, detail="Discord rate limited. Try again in a moment.")
     if resp.status_code >= 400:
         raise HTTPException(status_code=resp.status_code, detail=resp.text)
 
-    chans = resp.json() or []
-    # Keep text (0) + announcement (5) channels only
-    filtered = [c for c in chans if c.get("type") in (0, 5)]
+    chans = orjson.loads(resp.content) or []
+    filtered = [c for c in chans if c.get("type") in _TEXT_CHANNEL_TYPES]
     # Sort by position so order matches Discord's sidebar
     filtered.sort(key=lambda c: (c.get("position") or 0))
     simplified = [
@@ -390,7 +450,7 @@ async def discord_bot_list_channels(guild_id: str):
         }
         for c in filtered
     ]
-    return JSONResponse({"channels": simplified})
+    return ORJSONResponse({"channels": simplified})
 
 
 @router.get("/discord/bot/channels/{channel_id}/messages")
@@ -404,19 +464,18 @@ async def discord_bot_get_messages(
     if before:
         params["before"] = before
 
-    async with httpx.AsyncClient(timeout=20) as client:
-        resp = await client.get(
-            f"{DISCORD_API_V10}/channels/{channel_id}/messages",
-            headers=_bot_headers(),
-            params=params,
-        )
+    resp = await _DISCORD_CLIENT.get(
+        f"{DISCORD_API_V10}/channels/{channel_id}/messages",
+        headers=_bot_headers(),
+        params=params,
+    )
 
     if resp.status_code == 429:
         raise HTTPException(status_code=429, detail="Discord rate limited. Try again in a moment.")
     if resp.status_code >= 400:
         raise HTTPException(status_code=resp.status_code, detail=resp.text)
 
-    return JSONResponse({"messages": resp.json()})
+    return ORJSONResponse({"messages": orjson.loads(resp.content)})
 
 
 @router.post("/discord/bot/channels/{channel_id}/import")
@@ -424,28 +483,38 @@ async def discord_bot_import_channel(
     channel_id: str,
     max_messages: int = Query(500, ge=1, le=5000),
 ):
-    """Fetch messages from a channel and return a plain-text transcript for ingestion."""
-    collected: list[Dict[str, Any]] = []
-    before: Optional[str] = None
-
-    rate_limit_hits = 0
-    async with httpx.AsyncClient(timeout=30) as client:
-        while len(collected) < max_messages:
-            params: Dict[str, Any] = {"limit": 100}
-            if before:
-                params["before"] = before
-
-            resp = await client.get(
+    """Fetch messages from a channel and return a plain-text transcript for ingestion.
+
+    The body is streamed: each page of messages is formatted and written out
+    as soon as it is fetched, so neither raw messages nor the transcript are
+    held in memory. Discord pages backwards from the newest message, so the
+    transcript reads newest -> oldest. Only the first page can still fail the
+    request; a later page that errors or is rate limited too often ends the
+    transcript early with what was fetched, and "count" (written last)
+    reflects that.
+    """
+
+    def fetch_page(cursor: Optional[str]) -> "asyncio.Task[httpx.Response]":
+        params: Dict[str, Any] = {"limit": 100}
+        if cursor:
+            params["before"] = cursor
+        return asyncio.create_task(
+            _DISCORD_CLIENT.get(
                 f"{DISCORD_API_V10}/channels/{channel_id}/messages",
                 headers=_bot_headers(),
                 params=params,
+                timeout=30,
             )
+        )
 
+    async def fetch_batch(cursor: Optional[str]) -> list[Dict[str, Any]]:
+        rate_limit_hits = 0
+        while True:
+            resp = await fetch_page(cursor)
             if resp.status_code == 429:
                 rate_limit_hits += 1
                 if rate_limit_hits > 5:
-                    # Too many rate-limits — return what we have so far
-                    break
+                    raise HTTPException(status_code=429, detail="Discord rate limited. Try again in a moment.")
                 retry_after = resp.headers.get("Retry-After")
                 try:
                     wait_s = float(retry_after) if retry_after else (2.0 ** rate_limit_hits)
@@ -453,34 +522,55 @@ async def discord_bot_import_channel(
                     wait_s = 2.0 ** rate_limit_hits
                 await asyncio.sleep(min(wait_s, 30.0))
                 continue
-
             if resp.status_code >= 400:
                 raise HTTPException(status_code=resp.status_code, detail=f"Discord API error {resp.status_code}")
+            return orjson.loads(resp.content) or []
 
-            batch = resp.json() or []
-            if not batch:
-                break
-
-            collected.extend(batch)
-            before = batch[-1].get("id")
-
-            if len(batch) < 100:
-                break
-
-    # Oldest -> newest for readable transcript
-    collected = list(reversed(collected))
-
-    lines: list[str] = []
-    for m in collected:
-        ts = m.get("timestamp") or ""
-        author = (m.get("author") or {}).get("username") or "unknown"
-        content = (m.get("content") or "").strip()
-
+    def page_lines(batch: list[Dict[str, Any]]) -> str:
         # Skip empty messages (attachments only) for now
-        if not content:
-            continue
-
-        lines.append(f"{ts} - {author}: {content}")
-
-    transcript = "\n".join(lines)
-    return JSONResponse({"channel_id": channel_id, "count": len(collected), "text": transcript})
\ No newline at end of file
+        return "\n".join([
+            f"{m.get('timestamp') or ''} - {(m.get('author') or {}).get('username') or 'unknown'}: {content}"
+            for m in batch
+            if (content := (m.get("content") or "").strip())
+        ])
+
+    # Fetch the first page before the response starts so a bad channel id or
+    # missing permission still comes back as a proper error status.
+    first_batch = await fetch_batch(None)
+
+    async def transcript_json():
+        yield b'{"channel_id":%b,"text":"' % orjson.dumps(channel_id)
+        batch = first_batch
+        count = 0
+        wrote_text = False
+        pending: Optional[asyncio.Task[list[Dict[str, Any]]]] = None
+        try:
+            while batch:
+                # The next page is requested as soon as its cursor is known, so
+                # the network round trip overlaps with writing out this page.
+                if len(batch) == 100 and count + len(batch) < max_messages:
+                    pending = asyncio.create_task(fetch_batch(batch[-1].get("id")))
+                count += len(batch)
+
+                text = page_lines(batch)
+                if text:
+                    if wrote_text:
+                        yield b"\\n"
+                    yield orjson.dumps(text)[1:-1]
+                    wrote_text = True
+
+                if pending is None:
+                    break
+                try:
+                    batch = await pending
+                except HTTPException as exc:
+                    logger.warning("Discord import of channel %s stopped early: %s", channel_id, exc.detail)
+                    break
+                pending = None
+        finally:
+            if pending is not None:
+                pending.cancel()
+                await asyncio.gather(pending, return_exceptions=True)
+        yield b'","count":%d}' % count
+
+    return StreamingResponse(transcript_json(), media_type="application/json")
\ No newline at end of file
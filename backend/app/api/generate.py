@@ -1,91 +1,282 @@
 from __future__ import annotations
 
-import json
-import os
-from typing import Literal, Optional
+import asyncio
+from functools import lru_cache
+from typing import Annotated, Literal, Optional
 
-from fastapi import APIRouter, HTTPException, Request
-from pydantic import BaseModel, Field
-from openai import OpenAI
+import httpx
+import msgspec
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from openai import AsyncOpenAI
 
 # Import DB-based session reader from chat module (upload.py stores sessions there)
 from app.api.chat import _read_session_text, _verify_session_owner
+from app.core.config import settings
 
 router = APIRouter()
 
 
-def _get_client() -> OpenAI:
-    api_key = os.getenv("OPENAI_API_KEY")
+# One pooled HTTP client for every generate call, so concurrent requests reuse
+# warm TLS connections to the OpenAI API instead of handshaking each time.
+# HTTP/2 multiplexes concurrent completions over those connections, and the
+# pool is sized so bursts don't queue behind it. Retries are left to the SDK
+# (the transport's own retries only cover connect errors). A custom transport
+# ignores client-level limits, so they are set on the transport.
+_HTTP_CLIENT = httpx.AsyncClient(
+    transport=httpx.AsyncHTTPTransport(
+        http2=True,
+        retries=0,
+        limits=httpx.Limits(max_keepalive_connections=100, max_connections=200, keepalive_expiry=30.0),
+    ),
+    # The OpenAI SDK's own default (600s read, 5s connect): long non-streaming
+    # generations must not time out, since each timeout is retried and billed.
+    timeout=httpx.Timeout(600.0, connect=5.0),
+)
+_CLIENT: AsyncOpenAI | None = None
+
+
+def _get_client() -> AsyncOpenAI:
+    global _CLIENT
+    if _CLIENT is not None:
+        return _CLIENT
+    api_key = settings.OPENAI_API_KEY
     if not api_key:
         raise HTTPException(status_code=500, detail="OPENAI_API_KEY is not set in the backend environment.")
-    return OpenAI(api_key=api_key)
+    _CLIENT = AsyncOpenAI(api_key=api_key, http_client=_HTTP_CLIENT)
+    return _CLIENT
+
+
+async def close_generate_client() -> None:
+    """Close the pooled OpenAI HTTP client (app shutdown hook)."""
+    await _HTTP_CLIENT.aclose()
+
+
+router.add_event_handler("shutdown", close_generate_client)
+
+
+_FLASHCARD_DIFFICULTY_INSTRUCTIONS = {
+    "easy": (
+        "Focus on basic definitions and key terms. "
+        "The front should ask a simple recall question and the back should be a short, direct answer (max 3 words)."
+    ),
+    "medium": (
+        "Mix basic recall with conceptual questions. "
+        "Some fronts should ask about relationships or processes. Back answers max 3 words."
+    ),
+    "hard": (
+        "Focus on nuanced concepts, edge cases, and comparisons. "
+        "Fronts should require deeper understanding. Back answers max 3 words."
+    ),
+}
+
+# Response schemas are embedded in the prompt as JSON text, so they are
+# serialized once here instead of being rebuilt and dumped on every request.
+_PODCAST_SCHEMA = {
+    "name": "podcast_schema",
+    "schema": {
+        "type": "object",
+        "properties": {
+            "type": {"type": "string", "enum": ["podcast"]},
+            "speakers": {
+                "type": "array",
+                "minItems": 2,
+                "maxItems": 2,
+                "items": {"type": "string"},
+            },
+            "script": {
+                "type": "array",
+                "minItems": 12,
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "speaker": {"type": "string"},
+                        "text": {"type": "string"},
+                    },
+                    "required": ["speaker", "text"],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["type", "speakers", "script"],
+        "additionalProperties": False,
+    },
+}
+
+_TEXT_OUTPUT_SCHEMA = {
+    "name": "text_output_schema",
+    "schema": {
+        "type": "object",
+        "properties": {
+            "type": {"type": "string", "enum": ["study_guide", "narrative"]},
+            "text": {"type": "string"},
+        },
+        "required": ["type", "text"],
+        "additionalProperties": False,
+    },
+}
+
+_PODCAST_SCHEMA_JSON = orjson.dumps(_PODCAST_SCHEMA).decode()
+_TEXT_OUTPUT_SCHEMA_JSON = orjson.dumps(_TEXT_OUTPUT_SCHEMA).decode()
+
+
+@lru_cache(maxsize=64)
+def _flashcards_schema_json(count: int) -> str:
+    """Serialized flashcard schema for an exact card count (count is 5-50)."""
+    schema = {
+        "name": "flashcards_schema",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "type": {"type": "string", "enum": ["flash_card"]},
+                "cards": {
+                    "type": "array",
+                    "minItems": count,
+                    "maxItems": count,
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "front": {"type": "string"},
+                            "back": {"type": "string"},
+                        },
+                        "required": ["front", "back"],
+                        "additionalProperties": False,
+                    },
+                },
+            },
+            "required": ["type", "cards"],
+            "additionalProperties": False,
+        },
+    }
+    return orjson.dumps(schema).decode()
+
+
+# Typed model outputs, decoded and validated in one pass. ``type`` defaults to
+# the requested output so a missing tag is tolerated, as before.
+class Flashcard(msgspec.Struct):
+    front: str
+    back: str
+
+
+class FlashcardPayload(msgspec.Struct, kw_only=True):
+    type: str = "flash_card"
+    cards: list[Flashcard]
+
+
+class PodcastTurn(msgspec.Struct):
+    speaker: str
+    text: str
+
+
+class PodcastPayload(msgspec.Struct, kw_only=True):
+    type: str = "podcast"
+    speakers: list[str]
+    script: list[PodcastTurn]
+
+
+class TextPayload(msgspec.Struct, kw_only=True):
+    type: str = "study_guide"
+    text: str
+
 
+_DECODERS: dict[str, msgspec.json.Decoder] = {
+    "flash_card": msgspec.json.Decoder(FlashcardPayload),
+    "podcast": msgspec.json.Decoder(PodcastPayload),
+    "study_guide": msgspec.json.Decoder(TextPayload),
+    "narrative": msgspec.json.Decoder(TextPayload),
+}
 
-class GenerateRequest(BaseModel):
+
+class GenerateRequest(msgspec.Struct):
     session_id: str
     output_type: Literal["flash_card", "study_guide", "podcast", "narrative"]
-    count: Optional[int] = Field(default=20, ge=5, le=50)
-    difficulty: Optional[Literal["easy", "medium", "hard"]] = Field(default="medium")
+    count: Optional[Annotated[int, msgspec.Meta(ge=5, le=50)]] = 20
+    difficulty: Optional[Literal["easy", "medium", "hard"]] = "medium"
     # Podcast refinement fields — only used when output_type == "podcast"
-    refinement_instructions: Optional[str] = Field(default=None, max_length=1000)
-    previous_script: Optional[list] = Field(default=None)
+    refinement_instructions: Optional[Annotated[str, msgspec.Meta(max_length=1000)]] = None
+    previous_script: Optional[list] = None
 
 
-@router.post("/generate")
-def generate(req: GenerateRequest, request: Request):
+class GenerateBatchRequest(msgspec.Struct):
+    session_id: str
+    output_types: Annotated[
+        list[Literal["flash_card", "study_guide", "podcast", "narrative"]],
+        msgspec.Meta(min_length=1, max_length=4),
+    ]
+    count: Optional[Annotated[int, msgspec.Meta(ge=5, le=50)]] = 20
+    difficulty: Optional[Literal["easy", "medium", "hard"]] = "medium"
+
+
+_REQUEST_DECODER = msgspec.json.Decoder(GenerateRequest)
+_BATCH_REQUEST_DECODER = msgspec.json.Decoder(GenerateBatchRequest)
+
+
+async def _generate_request(request: Request) -> GenerateRequest:
+    """Decode and validate the /generate body in one msgspec pass (no pydantic model)."""
+    try:
+        return _REQUEST_DECODER.decode(await request.body())
+    except msgspec.DecodeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+async def _generate_batch_request(request: Request) -> GenerateBatchRequest:
+    try:
+        return _BATCH_REQUEST_DECODER.decode(await request.body())
+    except msgspec.DecodeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+async def _load_corpus(session_id: str, request: Request) -> str:
     # Verify the requester owns this session before generating content
-    _verify_session_owner(req.session_id, request)
+    await asyncio.to_thread(_verify_session_owner, session_id, request)
 
     # Use DB-backed session text (matches what upload.py stores)
-    corpus = _read_session_text(req.session_id).strip()
-    if not corpus:
-        raise HTTPException(status_code=400, detail="No extracted text available for this session.")
+    return await asyncio.to_thread(_read_session_text, session_id, max_chars=60_000)
+
+
+@router.post("/generate")
+async def generate(request: Request, req: GenerateRequest = Depends(_generate_request)):
+    corpus = await _load_corpus(req.session_id, request)
+    payload = await _generate_payload(req, corpus)
+    return Response(content=msgspec.json.encode(payload), media_type="application/json")
 
-    corpus = corpus[:60_000]
+
+@router.post("/generate_batch")
+async def generate_batch(request: Request, req: GenerateBatchRequest = Depends(_generate_batch_request)):
+    """Generate several output types for one session with concurrent model calls."""
+    corpus = await _load_corpus(req.session_id, request)
+    # A TaskGroup cancels the sibling model calls as soon as one fails, so a
+    # request that is going to error doesn't keep paying for the others.
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tasks = [
+                tg.create_task(_generate_payload(
+                    GenerateRequest(
+                        session_id=req.session_id,
+                        output_type=output_type,
+                        count=req.count,
+                        difficulty=req.difficulty,
+                    ),
+                    corpus,
+                ))
+                for output_type in req.output_types
+            ]
+    except ExceptionGroup as eg:
+        # Surface the first failure as-is (e.g. the 502 HTTPException)
+        raise eg.exceptions[0]
+    payloads = [task.result() for task in tasks]
+    return Response(content=msgspec.json.encode({"results": payloads}), media_type="application/json")
+
+
+async def _generate_payload(req: GenerateRequest, corpus: str):
+    """Run one model call for ``req.output_type`` and return the validated payload struct."""
     count = int(req.count or 20)
     difficulty = req.difficulty or "medium"
 
-    flashcard_difficulty_instruction = {
-        "easy": (
-            "Focus on basic definitions and key terms. "
-            "The front should ask a simple recall question and the back should be a short, direct answer (max 3 words)."
-        ),
-        "medium": (
-            "Mix basic recall with conceptual questions. "
-            "Some fronts should ask about relationships or processes. Back answers max 3 words."
-        ),
-        "hard": (
-            "Focus on nuanced concepts, edge cases, and comparisons. "
-            "Fronts should require deeper understanding. Back answers max 3 words."
-        ),
-    }[difficulty]
+    flashcard_difficulty_instruction = _FLASHCARD_DIFFICULTY_INSTRUCTIONS[difficulty]
 
     if req.output_type == "flash_card":
-        schema = {
-            "name": "flashcards_schema",
-            "schema": {
-                "type": "object",
-                "properties": {
-                    "type": {"type": "string", "enum": ["flash_card"]},
-                    "cards": {
-                        "type": "array",
-                        "minItems": count,
-                        "maxItems": count,
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "front": {"type": "string"},
-                                "back": {"type": "string"},
-                            },
-                            "required": ["front", "back"],
-                            "additionalProperties": False,
-                        },
-                    },
-                },
-                "required": ["type", "cards"],
-                "additionalProperties": False,
-            },
-        }
+        schema_json = _flashcards_schema_json(count)
 
         prompt = (
             "You are a study assistant. Create high-quality flashcards strictly from the provided content. "
@@ -98,41 +289,11 @@ def generate(req: GenerateRequest, request: Request):
         user_instruction = f"CONTENT:\n{corpus}\n\nMake exactly {count} flashcards at {difficulty} difficulty."
 
     elif req.output_type == "podcast":
-        schema = {
-            "name": "podcast_schema",
-            "schema": {
-                "type": "object",
-                "properties": {
-                    "type": {"type": "string", "enum": ["podcast"]},
-                    "speakers": {
-                        "type": "array",
-                        "minItems": 2,
-                        "maxItems": 2,
-                        "items": {"type": "string"},
-                    },
-                    "script": {
-                        "type": "array",
-                        "minItems": 12,
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "speaker": {"type": "string"},
-                                "text": {"type": "string"},
-                            },
-                            "required": ["speaker", "text"],
-                            "additionalProperties": False,
-                        },
-                    },
-                },
-                "required": ["type", "speakers", "script"],
-                "additionalProperties": False,
-            },
-        }
+        schema_json = _PODCAST_SCHEMA_JSON
 
         if req.refinement_instructions and req.previous_script:
             # Regeneration mode: refine the previous script based on user instructions
-            import json as _json
-            prev_script_str = _json.dumps(req.previous_script, ensure_ascii=False)
+            prev_script_str = orjson.dumps(req.previous_script).decode()
             prompt = (
                 "You are a study assistant. You previously generated a podcast script from the provided content. "
                 "The user wants to refine it. Apply their instructions to produce an improved version "
@@ -159,18 +320,7 @@ def generate(req: GenerateRequest, request: Request):
             )
 
     else:
-        schema = {
-            "name": "text_output_schema",
-            "schema": {
-                "type": "object",
-                "properties": {
-                    "type": {"type": "string", "enum": ["study_guide", "narrative"]},
-                    "text": {"type": "string"},
-                },
-                "required": ["type", "text"],
-                "additionalProperties": False,
-            },
-        }
+        schema_json = _TEXT_OUTPUT_SCHEMA_JSON
 
         if req.output_type == "study_guide":
             prompt = (
@@ -185,17 +335,15 @@ def generate(req: GenerateRequest, request: Request):
             )
             user_instruction = f"CONTENT:\n{corpus}\n\nReturn the narrative as plain text in the 'text' field."
 
-    model_name = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-
-    resp = _get_client().chat.completions.create(
-        model=model_name,
+    resp = await _get_client().chat.completions.create(
+        model=settings.OPENAI_MODEL,
         messages=[
             {"role": "system", "content": prompt},
             {
                 "role": "user",
                 "content": (
                     "Return ONLY valid JSON. No extra text.\n\n"
-                    f"Schema (JSON Schema wrapper):\n{json.dumps(schema, ensure_ascii=False)}\n\n"
+                    f"Schema (JSON Schema wrapper):\n{schema_json}\n\n"
                     f"{user_instruction}"
                 ),
             },
@@ -205,12 +353,13 @@ def generate(req: GenerateRequest, request: Request):
 
     content = (resp.choices[0].message.content or "").strip()
     try:
-        payload = json.loads(content)
-    except Exception:
+        payload = _DECODERS[req.output_type].decode(content)
+    except msgspec.ValidationError as e:
+        raise HTTPException(status_code=502, detail=f"Model returned JSON that does not match the schema: {e}")
+    except msgspec.DecodeError:
         raise HTTPException(status_code=502, detail=f"Model returned invalid JSON: {content[:200]}")
 
-    payload_type = payload.get("type")
-    if req.output_type in ("study_guide", "narrative") and payload_type != req.output_type:
-        payload["type"] = req.output_type
+    if isinstance(payload, TextPayload):
+        payload.type = req.output_type
 
     return payload
@@ -1,8 +1,13 @@
-from fastapi import APIRouter
+import orjson
+from fastapi import APIRouter, Response
 
 router = APIRouter(tags=["health"])
 
+# Probes hit this constantly; serialize the body once. main.py also serves
+# it from HealthProbeMiddleware, ahead of the rest of the middleware stack.
+HEALTH_BODY = orjson.dumps({"status": "ok"})
+
 
 @router.get("/health")
-def health():
-    return {"status": "ok"}
+async def health():
+    return Response(content=HEALTH_BODY, media_type="application/json")
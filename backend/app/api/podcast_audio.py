@@ -10,13 +10,14 @@ toggling TTS_PROVIDER=google — all else stays the same.
 from __future__ import annotations
 
 import io
-import os
 from typing import Any
 
 from fastapi import APIRouter, HTTPException, Response
 from pydantic import BaseModel, Field
 from openai import OpenAI
 
+from app.core.config import settings
+
 router = APIRouter()
 
 # Map speaker index (0 or 1) to a voice
@@ -27,7 +28,7 @@ VOICE_MAP = {
 
 
 def _get_client() -> OpenAI:
-    api_key = os.getenv("OPENAI_API_KEY")
+    api_key = settings.OPENAI_API_KEY
     if not api_key:
         raise HTTPException(status_code=500, detail="OPENAI_API_KEY not configured.")
     return OpenAI(api_key=api_key)
@@ -52,7 +53,7 @@ async def generate_podcast_audio(req: PodcastAudioRequest):
     then concatenated into a single MP3 stream returned directly.
     """
     client = _get_client()
-    model = os.getenv("OPENAI_TTS_MODEL", "tts-1")
+    model = settings.OPENAI_TTS_MODEL
 
     # Build speaker → voice mapping based on order of first appearance
     speaker_voice: dict[str, str] = {}
@@ -112,7 +113,7 @@ async def tts_single(req: SingleTTSRequest):
     Simple single-voice TTS — useful for previewing individual lines.
     """
     client = _get_client()
-    model = os.getenv("OPENAI_TTS_MODEL", "tts-1")
+    model = settings.OPENAI_TTS_MODEL
 
     valid_voices = {"alloy", "echo", "fable", "onyx", "nova", "shimmer"}
     voice = req.voice if req.voice in valid_voices else "alloy"
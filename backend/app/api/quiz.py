@@ -6,20 +6,20 @@ Uses OpenAI structured outputs (json_schema) to guarantee question array is alwa
 from __future__ import annotations
 
 import json
-import os
 from typing import Literal, Optional
 
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel, Field
 
 from openai import OpenAI
+from app.core.config import settings
 from app.api.chat import _read_session_text, _verify_session_owner
 
 router = APIRouter()
 
 
 def _get_client() -> OpenAI:
-    api_key = os.getenv("OPENAI_API_KEY")
+    api_key = settings.OPENAI_API_KEY
     if not api_key:
         raise HTTPException(status_code=500, detail="OPENAI_API_KEY is not set.")
     return OpenAI(api_key=api_key)
@@ -34,11 +34,8 @@ class QuizRequest(BaseModel):
 @router.post("/quiz/generate")
 def generate_quiz(req: QuizRequest, request: Request):
     _verify_session_owner(req.session_id, request)
-    corpus = _read_session_text(req.session_id).strip()
-    if not corpus:
-        raise HTTPException(status_code=400, detail="No extracted text available for this session.")
+    corpus = _read_session_text(req.session_id, max_chars=50_000)
 
-    corpus = corpus[:50_000]
     count = int(req.count or 10)
     difficulty = req.difficulty or "medium"
 
@@ -100,7 +97,7 @@ def generate_quiz(req: QuizRequest, request: Request):
         f"Generate exactly {count} multiple-choice questions at {difficulty} difficulty from the content above."
     )
 
-    model_name = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    model_name = settings.OPENAI_MODEL
 
     try:
         resp = _get_client().chat.completions.create(
@@ -1,18 +1,89 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
 import uuid
-from typing import List
+from functools import lru_cache
+from typing import BinaryIO, List
 
 from fastapi import APIRouter, UploadFile, File, HTTPException, Request
 
 from app.api.chat import _require_engine, _require_owner, _store_session_text
-from app.core.extractors import extract_text_any
+from app.core.config import settings
+from app.core.extraction_pool import extract_in_pool, shutdown_extraction_pool
 
-router = APIRouter()
+# Optional tokenizer for exact prompt budgeting (falls back to a char cap)
+try:
+    import tiktoken  # type: ignore
+except Exception:  # pragma: no cover
+    tiktoken = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(on_shutdown=[shutdown_extraction_pool])
 
 MAX_FILES = 20
 MAX_BYTES_PER_FILE = 25 * 1024 * 1024  # 25MB
 SESSION_TTL_SECONDS = 60 * 60 * 24 * 30  # informational only; session text is stored in DB
+# Session text is capped once at upload so every later prompt reuses it as-is.
+MAX_PROMPT_TOKENS = 15_000
+MAX_PROMPT_CHARS = 60_000  # used when tiktoken or its encoding is unavailable
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """The model's tokenizer, or None when tiktoken can't provide it.
+
+    tiktoken downloads the BPE file on first use unless it is already in
+    TIKTOKEN_CACHE_DIR (the Docker image pre-fetches it); a failed load is
+    cached as None so uploads don't retry the download each time.
+    """
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(settings.OPENAI_MODEL)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        logger.warning("tiktoken encoding unavailable; capping prompts by characters", exc_info=True)
+        return None
+
+
+def _cap_prompt_text(text: str) -> str:
+    """Trim text to the prompt budget on a token boundary (or a char cap without a tokenizer)."""
+    enc = _encoding()
+    if enc is None:
+        return text[:MAX_PROMPT_CHARS]
+    tokens = enc.encode(text, disallowed_special=())
+    if len(tokens) <= MAX_PROMPT_TOKENS:
+        return text
+    return enc.decode(tokens[:MAX_PROMPT_TOKENS])
+
+
+def _uuid4_batch(n: int) -> list[str]:
+    """Return ``n`` random (v4) UUID strings from a single os.urandom read."""
+    raw = os.urandom(16 * n)
+    return [str(uuid.UUID(bytes=raw[i:i + 16], version=4)) for i in range(0, 16 * n, 16)]
+
+
+def _spool_to_disk(src: BinaryIO) -> str:
+    """Copy an upload to a named temp file and return its path (caller unlinks)."""
+    src.seek(0)
+    with tempfile.NamedTemporaryFile(prefix="pu_upload_", delete=False) as tmp:
+        shutil.copyfileobj(src, tmp, 1024 * 1024)
+    return tmp.name
+
+
+def _file_size(fp: BinaryIO) -> int:
+    fp.seek(0, os.SEEK_END)
+    size = fp.tell()
+    fp.seek(0)
+    return size
+
 
 @router.post("/upload")
 async def upload_files(request: Request, files: List[UploadFile] = File(...)):
@@ -21,19 +92,50 @@ async def upload_files(request: Request, files: List[UploadFile] = File(...)):
     if len(files) > MAX_FILES:
         raise HTTPException(status_code=400, detail=f"Too many files. Max {MAX_FILES}.")
 
+    try:
+        # Starlette records the size while parsing the multipart body; only fall
+        # back to seeking the spooled file when it is missing.
+        sizes = [f.size if f.size is not None else _file_size(f.file) for f in files]
+
+        for f, size in zip(files, sizes):
+            if size > MAX_BYTES_PER_FILE:
+                raise HTTPException(status_code=413, detail=f"File too large: {f.filename}")
+
+        async def extract(f: UploadFile) -> tuple[str, str]:
+            path = None
+            try:
+                # Hand the worker process a path: the upload is copied to disk in
+                # chunks rather than pickled across as one bytes object.
+                path = await asyncio.to_thread(_spool_to_disk, f.file)
+                # OCR will be plugged in later (Textract / Tesseract)
+                return await extract_in_pool(f.filename or "", f.content_type or "", path)
+            except Exception:
+                return "extract_failed", ""
+            finally:
+                if path is not None:
+                    os.unlink(path)
+
+        # Extraction is CPU-bound parser work, so every non-empty file is
+        # extracted concurrently in the process pool, off the event loop.
+        results = await asyncio.gather(
+            *(extract(f) for f, size in zip(files, sizes) if size)
+        )
+    finally:
+        await asyncio.gather(*(f.close() for f in files))
+    extracted = iter(results)
+
+    # One id per file plus the session id
+    *file_ids, session_id = _uuid4_batch(len(files) + 1)
+
     out = []
+    # Header, text and separator pieces for every file, joined once below so
+    # each extracted text is copied a single time into the session text.
     combined_parts: list[str] = []
 
-    for f in files:
-        try:
-            data = await f.read()
-        finally:
-            await f.close()
-        size = len(data)
-
+    for f, size, file_id in zip(files, sizes, file_ids):
         if size == 0:
             out.append({
-                "id": str(uuid.uuid4()),
+                "id": file_id,
                 "name": f.filename,
                 "mime": f.content_type or "",
                 "size": 0,
@@ -42,21 +144,10 @@ async def upload_files(request: Request, files: List[UploadFile] = File(...)):
             })
             continue
 
-        if size > MAX_BYTES_PER_FILE:
-            raise HTTPException(status_code=413, detail=f"File too large: {f.filename}")
-
-        try:
-            status, text = extract_text_any(
-                filename=f.filename or "",
-                mime=f.content_type or "",
-                data=data,
-                ocr=None,  # OCR will be plugged in later (Textract / Tesseract)
-            )
-        except Exception:
-            status, text = "extract_failed", ""
+        status, text = next(extracted)
 
         out.append({
-            "id": str(uuid.uuid4()),
+            "id": file_id,
             "name": f.filename,
             "mime": f.content_type or "",
             "size": size,
@@ -65,9 +156,13 @@ async def upload_files(request: Request, files: List[UploadFile] = File(...)):
         })
 
         if text:
-            combined_parts.append(f"--- {f.filename} ---\n{text}")
+            if combined_parts:
+                combined_parts.append("\n\n")
+            combined_parts += (f"--- {f.filename} ---\n", text)
 
-    combined_text = "\n\n".join(combined_parts).strip()
+    # Extracted texts are already stripped and every part starts with its
+    # header, so the joined text needs no further strip.
+    combined_text = "".join(combined_parts)
 
     # If we got no extracted text, allow the upload to succeed when files need OCR
     # (e.g., screenshots / images / scanned PDFs). Otherwise, treat it as a true failure.
@@ -79,11 +174,14 @@ async def upload_files(request: Request, files: List[UploadFile] = File(...)):
     if not combined_text and needs_ocr:
         combined_text = ""
 
-    session_id = str(uuid.uuid4())
+    # Tokenizing a large corpus is CPU work, so it stays off the event loop.
+    combined_text = await asyncio.to_thread(_cap_prompt_text, combined_text)
+
     try:
         engine = _require_engine()
         owner_user_id, owner_anon_id = _require_owner(request)
-        _store_session_text(
+        await asyncio.to_thread(
+            _store_session_text,
             engine,
             session_id,
             combined_text,
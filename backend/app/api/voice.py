@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import os
 from typing import Optional
 
 import httpx
@@ -8,6 +7,7 @@ from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel, Field
 
 from app.api.chat import _read_session_text, _verify_session_owner
+from app.core.config import settings
 
 router = APIRouter(tags=["voice"])
 
@@ -111,7 +111,7 @@ async def create_voice_session(req: VoiceSessionRequest, request: Request):
     The frontend uses this token directly for WebRTC — the permanent API key
     never leaves the backend.
     """
-    api_key = os.getenv("OPENAI_API_KEY")
+    api_key = settings.OPENAI_API_KEY
     if not api_key:
         raise HTTPException(status_code=500, detail="OPENAI_API_KEY is not configured on the server.")
 
@@ -122,9 +122,7 @@ async def create_voice_session(req: VoiceSessionRequest, request: Request):
     if req.session_id:
         try:
             _verify_session_owner(req.session_id, request)
-            raw = _read_session_text(req.session_id).strip()
-            if raw:
-                corpus = raw
+            corpus = _read_session_text(req.session_id, max_chars=8_000)
         except Exception:
             # Session not found or not owned — silently continue without context
             pass
@@ -196,9 +194,7 @@ async def update_session_language(req: LanguageUpdateRequest, request: Request):
     if req.session_id:
         try:
             _verify_session_owner(req.session_id, request)
-            raw = _read_session_text(req.session_id).strip()
-            if raw:
-                corpus = raw
+            corpus = _read_session_text(req.session_id, max_chars=8_000)
         except Exception:
             pass
 
@@ -228,7 +224,7 @@ async def voice_preview(voice: str):
     Returns a short MP3 audio sample of the requested OpenAI TTS voice.
     Used by the frontend to let users audition voices before starting a session.
     """
-    api_key = os.getenv("OPENAI_API_KEY")
+    api_key = settings.OPENAI_API_KEY
     if not api_key:
         raise HTTPException(status_code=500, detail="OPENAI_API_KEY not configured.")
 
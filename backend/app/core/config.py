@@ -1,20 +1,90 @@
 from typing import List
+from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
-    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+    # Read from the environment once at import; frozen so nothing mutates it
+    # at runtime and request paths read attributes instead of os.getenv.
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore", frozen=True)
 
     APP_NAME: str = "PrepareUp API"
     ENV: str = "local"
     DATABASE_URL: str
 
+    # Connection pool / server-side limits. DB_CONNECTION_BUDGET is the most
+    # connections the whole deployment may open (keep it under Postgres'
+    # max_connections, default 100); pool size and overflow are derived from
+    # it per engine and per worker unless set explicitly (see app/db/session.py)
+    DB_CONNECTION_BUDGET: int = 80
+    DB_POOL_SIZE: int | None = None
+    DB_MAX_OVERFLOW: int | None = None
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_STATEMENT_TIMEOUT_MS: int = 30000
+    # psycopg prepare_threshold; "none" disables server-side prepares
+    DB_PREPARE_THRESHOLD: str = "2"
+
+    APP_SECRET: str = "dev_secret_change_me"
+    # Falls back to APP_SECRET when unset
+    JWT_SECRET: str | None = None
+    JWT_ALGORITHM: str = "HS256"
+    GOOGLE_CLIENT_ID: str | None = None
+
+    OPENAI_API_KEY: str | None = None
+    OPENAI_MODEL: str = "gpt-4o-mini"
+    # Falls back to OPENAI_MODEL when unset
+    OPENAI_CHAT_MODEL: str | None = None
+    OPENAI_TTS_MODEL: str = "tts-1"
+
+    # Discord OAuth + bot (required only by the Discord routes)
+    DISCORD_CLIENT_ID: str | None = None
+    DISCORD_CLIENT_SECRET: str | None = None
+    # Must match the Discord Developer Portal redirect exactly
+    DISCORD_REDIRECT_URI: str = "http://localhost:8000/api/auth/discord/callback"
+    DISCORD_BOT_TOKEN: str | None = None
+    DISCORD_BOT_PERMISSIONS: int = 66560
+    FRONTEND_BASE_URL: str = "http://localhost:3000"
+
     # comma-separated origins, e.g. "http://localhost:3000,http://127.0.0.1:3000"
     CORS_ORIGINS: str = "http://localhost:3000"
+    COOKIE_SECURE: bool = False
+    COOKIE_DOMAIN: str | None = None
+    # comma-separated routers this process should not serve, e.g. "generate,discord_integration"
+    DISABLED_ROUTERS: str = ""
+
+    # uvicorn worker processes (the Docker entrypoint exports its --workers
+    # value); per-process resources are sized from it
+    WEB_CONCURRENCY: int = 1
+    # Document extraction processes per worker; defaults to cpu_count // WEB_CONCURRENCY
+    EXTRACTION_WORKERS: int | None = None
+
+    # Serve a pyinstrument report for requests carrying ?profile=1 (dev/staging only)
+    PROFILE_ENABLED: bool = False
+
+    # An empty env var (e.g. "COOKIE_SECURE=" from .env.example) means unset,
+    # as it did with the os.getenv parsing these replaced.
+    @field_validator("COOKIE_SECURE", "PROFILE_ENABLED", mode="before")
+    @classmethod
+    def _empty_is_false(cls, v):
+        return False if isinstance(v, str) and not v.strip() else v
+
+    @field_validator("DB_POOL_SIZE", "DB_MAX_OVERFLOW", "EXTRACTION_WORKERS", mode="before")
+    @classmethod
+    def _empty_is_none(cls, v):
+        return None if isinstance(v, str) and not v.strip() else v
 
     @property
     def cors_origins_list(self) -> List[str]:
         return [o.strip() for o in self.CORS_ORIGINS.split(",") if o.strip()]
 
+    @property
+    def jwt_secret(self) -> str:
+        return self.JWT_SECRET or self.APP_SECRET
+
+    @property
+    def chat_model(self) -> str:
+        return self.OPENAI_CHAT_MODEL or self.OPENAI_MODEL
+
 
 settings = Settings()
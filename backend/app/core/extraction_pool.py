@@ -0,0 +1,84 @@
+"""Process pool for CPU-bound document text extraction.
+
+pypdf / python-docx / python-pptx parsing is pure Python and holds the GIL,
+so extracting in threads still starves the event loop. Extraction runs in
+separate worker processes instead; the pool is created on first use and
+shut down with the app.
+"""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
+from app.core.config import settings
+from app.core.extractors import extract_text_from_path
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _pool_size() -> int:
+    # Every uvicorn worker has its own pool, so split the CPUs between them
+    # rather than giving each one cpu_count processes.
+    if settings.EXTRACTION_WORKERS:
+        return settings.EXTRACTION_WORKERS
+    return max(1, (os.cpu_count() or 1) // max(1, settings.WEB_CONCURRENCY))
+
+
+def _warm_worker() -> None:
+    # Import the parsers up front so a worker's first file doesn't pay for it.
+    import app.core.extractors  # noqa: F401
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            # forkserver starts workers from a small clean process instead of
+            # forking the (threaded) app server; fall back to the default elsewhere.
+            ctx = (
+                multiprocessing.get_context("forkserver")
+                if "forkserver" in multiprocessing.get_all_start_methods()
+                else None
+            )
+            _POOL = ProcessPoolExecutor(
+                max_workers=_pool_size(),
+                mp_context=ctx,
+                initializer=_warm_worker,
+            )
+        return _POOL
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is pool:
+            _POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def extract_in_pool(filename: str, mime: str, path: str) -> Tuple[str, str]:
+    """Extract text from ``path`` in a worker process."""
+    pool = _get_pool()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            pool, extract_text_from_path, filename, mime, path
+        )
+    except BrokenProcessPool:
+        # A worker died (e.g. a parser crashed); start a fresh pool next time.
+        _discard_pool(pool)
+        raise
+
+
+async def shutdown_extraction_pool() -> None:
+    """Stop the extraction workers (app shutdown hook)."""
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
@@ -1,6 +1,7 @@
 from __future__ import annotations
+import os
 from io import BytesIO
-from typing import Tuple, Callable, Optional
+from typing import BinaryIO, Tuple, Callable, Optional
 
 from pypdf import PdfReader
 from docx import Document
@@ -33,9 +34,15 @@ try:
 except Exception:  # pragma: no cover
     pytesseract = None  # type: ignore
 
+# Optional fast PDF backend (C extension); falls back to pypdf if not installed
+try:
+    import pymupdf  # type: ignore
+except Exception:  # pragma: no cover
+    pymupdf = None  # type: ignore
+
 
-def _ocr_image_bytes(data: bytes) -> str:
-    """OCR an image byte payload to text.
+def _ocr_image_file(src: BinaryIO) -> str:
+    """OCR an image file to text.
 
     Requires Pillow + pytesseract to be installed. If not available, returns "".
     """
@@ -43,7 +50,7 @@ def _ocr_image_bytes(data: bytes) -> str:
         return ""
 
     try:
-        img = Image.open(BytesIO(data))
+        img = Image.open(src)
         # normalize to RGB for OCR
         if img.mode not in ("RGB", "L"):
             img = img.convert("RGB")
@@ -60,12 +67,31 @@ def _safe_decode(raw: bytes) -> str:
     
 OCRFN = Callable[[bytes], str]
 
-def extract_text_from_pdf(data:bytes) -> Tuple[str, str]:
-    reader =  PdfReader(BytesIO(data))
+# Extractors read from a seekable binary file (an upload's spooled temp file or
+# a BytesIO), so large uploads never have to be held in memory as one bytes.
+def _pdf_page_texts(src: BinaryIO):
+    if pymupdf is not None:
+        # A file opened from disk is handed to MuPDF by path so it reads pages
+        # from the file itself; only in-memory sources are passed as bytes.
+        path = getattr(src, "name", None)
+        if isinstance(path, str) and os.path.isfile(path):
+            doc = pymupdf.open(path, filetype="pdf")
+        else:
+            doc = pymupdf.open(stream=src.read(), filetype="pdf")
+        with doc:
+            for page in doc:
+                yield page.get_text("text") or ""
+        return
+
+    reader =  PdfReader(src)
+    for page in reader.pages:
+        yield page.extract_text() or ""
+
+
+def extract_text_from_pdf(src: BinaryIO) -> Tuple[str, str]:
     parts: list[str] = []
 
-    for page in reader.pages:
-        t = page.extract_text() or ""
+    for t in _pdf_page_texts(src):
         t = t.strip()
         if t:
             parts.append(t)
@@ -75,8 +101,8 @@ def extract_text_from_pdf(data:bytes) -> Tuple[str, str]:
         return "needs_ocr", ""
     return "extracted" , text
 
-def extract_text_from_docx(data: bytes) -> Tuple[str, str]:
-    doc = Document(BytesIO(data))
+def extract_text_from_docx(src: BinaryIO) -> Tuple[str, str]:
+    doc = Document(src)
     parts: list[str] = []
     for p in doc.paragraphs:
         t = (p.text or "").strip()
@@ -93,8 +119,8 @@ def extract_text_from_docx(data: bytes) -> Tuple[str, str]:
     return ("extracted", text) if text else ("extracted", "")   
 
 
-def extract_text_from_pptx(data: bytes) -> Tuple[str, str]:
-    prs = Presentation(BytesIO(data))
+def extract_text_from_pptx(src: BinaryIO) -> Tuple[str, str]:
+    prs = Presentation(src)
     parts: list[str] = []
 
     for si, slide in enumerate(prs.slides, start=1):
@@ -112,38 +138,52 @@ def extract_text_from_pptx(data: bytes) -> Tuple[str, str]:
     return ("extracted", text) if text else ("extracted", "")
 
 
-def extract_text_from_textlike(data: bytes) -> Tuple[str, str]:
-    text = _safe_decode(data).strip()
+def extract_text_from_textlike(src: BinaryIO) -> Tuple[str, str]:
+    text = _safe_decode(src.read()).strip()
     return ("extracted", text) if text else ("extracted", "")
 
-def extract_text_from_image(data: bytes) -> Tuple[str, str]:
+def extract_text_from_image(src: BinaryIO) -> Tuple[str, str]:
     # Try built-in OCR if Pillow + pytesseract are available.
-    text = _ocr_image_bytes(data)
+    text = _ocr_image_file(src)
     if text:
         return ("ocr_extracted", text)
     return ("needs_ocr", "")
 
 
-def pick_extractor(filename: str, mime: str):
-    name = (filename or "").lower()
+# Dispatch tables, built once below the extractor definitions. An exact MIME
+# match wins, then the file extension; text and image types fall back to
+# their MIME prefixes, with text checked before image as before.
+MIME_TO_EXTRACTOR = {
+    PDF_MIME: extract_text_from_pdf,
+    DOCX_MIME: extract_text_from_docx,
+    PPTX_MIME: extract_text_from_pptx,
+}
 
-    # PDF
-    if mime == PDF_MIME or name.endswith(".pdf"):
-        return extract_text_from_pdf
+SUFFIX_TO_EXTRACTOR = {
+    ".pdf": extract_text_from_pdf,
+    ".docx": extract_text_from_docx,
+    ".pptx": extract_text_from_pptx,
+}
 
-    # DOCX
-    if mime == DOCX_MIME or name.endswith(".docx"):
-        return extract_text_from_docx
+TEXT_EXT_SET = frozenset(TEXT_EXTS)
+IMAGE_EXT_SET = frozenset(IMAGE_EXTS)
 
-    # PPTX
-    if mime == PPTX_MIME or name.endswith(".pptx"):
-        return extract_text_from_pptx
+
+def pick_extractor(filename: str, mime: str):
+    name = (filename or "").lower()
+    dot = name.rfind(".")
+    ext = name[dot:] if dot >= 0 else ""
+
+    # PDF / DOCX / PPTX
+    extractor = MIME_TO_EXTRACTOR.get(mime) or SUFFIX_TO_EXTRACTOR.get(ext)
+    if extractor is not None:
+        return extractor
 
     # Text-like (by mime prefix or extension)
-    if mime.startswith(TEXT_MIME_PREFIXES) or name.endswith(TEXT_EXTS):
+    if mime.startswith(TEXT_MIME_PREFIXES) or ext in TEXT_EXT_SET:
         return extract_text_from_textlike
-    
-    if mime.startswith(IMAGE_MIME_PREFIXES) or name.endswith(IMAGE_EXTS):
+
+    if mime.startswith(IMAGE_MIME_PREFIXES) or ext in IMAGE_EXT_SET:
         return extract_text_from_image
 
     # Unknown/binary: accept, but no extraction
@@ -151,20 +191,35 @@ def pick_extractor(filename: str, mime: str):
 
 
 def extract_text_any(
-        *, filename: str, mime: str, data: bytes, ocr: Optional[OCRFN] = None
+        *,
+        filename: str,
+        mime: str,
+        data: Optional[bytes] = None,
+        file: Optional[BinaryIO] = None,
+        ocr: Optional[OCRFN] = None,
 ) -> Tuple[str, str]:
+    """Extract text from either in-memory ``data`` or a seekable binary ``file``."""
     extractor = pick_extractor(filename, mime)
     if extractor is None:
         return "unknown_format", ""
-    
-    status, text = extractor(data)
+
+    src: BinaryIO = file if file is not None else BytesIO(data or b"")
+    src.seek(0)
+    status, text = extractor(src)
     if status == "needs_ocr":
         # If caller provided a custom OCR function, prefer it.
         if ocr is not None:
-            ocr_text = (ocr(data) or "").strip()
+            src.seek(0)
+            ocr_text = (ocr(src.read()) or "").strip()
             return ("ocr_extracted", ocr_text) if ocr_text else ("ocr_failed", "")
 
         # Otherwise, for images we may have already tried built-in OCR; for PDFs/scans we still need OCR.
         return ("needs_ocr", "")
     
-    return status, text
\ No newline at end of file
+    return status, text
+
+
+def extract_text_from_path(filename: str, mime: str, path: str) -> Tuple[str, str]:
+    """Extract text from a file on disk (picklable entry point for worker processes)."""
+    with open(path, "rb") as fp:
+        return extract_text_any(filename=filename, mime=mime, file=fp)
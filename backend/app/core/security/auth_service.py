@@ -1,28 +1,55 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta
-import os
 import uuid
 
+from cachetools import TTLCache
 from jose import jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.security.google import verify_google_id_token
-from app.models.oauth_account import OAuthAccount
 from app.models.user import User
 
-JWT_SECRET = os.getenv("JWT_SECRET", "dev_jwt_secret_change_me")
-JWT_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 15
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
 
+_UPSERT_OAUTH_ACCOUNT = text(
+    """
+    WITH existing AS (
+        SELECT user_id FROM oauth_accounts
+        WHERE provider = :provider AND provider_subject = :subject
+    ),
+    new_user AS (
+        INSERT INTO users (display_name, avatar_url)
+        SELECT :name, :avatar
+        WHERE NOT EXISTS (SELECT 1 FROM existing)
+        RETURNING id
+    )
+    INSERT INTO oauth_accounts (user_id, provider, provider_subject, email_at_auth, provider_user_id)
+    SELECT COALESCE((SELECT user_id FROM existing), (SELECT id FROM new_user)),
+           :provider, :subject, :email, :subject
+    ON CONFLICT ON CONSTRAINT uq_oauth_provider_subject
+    DO UPDATE SET email_at_auth = COALESCE(EXCLUDED.email_at_auth, oauth_accounts.email_at_auth)
+    RETURNING user_id
+    """
+)
+
+
+# (provider, provider_subject) -> (user_id, email_at_auth). Repeat logins of a
+# known account with an unchanged email skip the upsert; the TTL bounds how
+# long another worker's change to the mapping can go unseen.
+_OAUTH_USER_CACHE: TTLCache = TTLCache(maxsize=4096, ttl=60)
+
+
 def create_access_token(user_id: uuid.UUID) -> str:
     exp = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     return jwt.encode(
         {"sub": str(user_id), "exp": exp, "type": "access"},
-        JWT_SECRET,
-        algorithm=JWT_ALGORITHM,
+        settings.jwt_secret,
+        algorithm=settings.JWT_ALGORITHM,
     )
 
 
@@ -30,8 +57,8 @@ def create_refresh_token(user_id: uuid.UUID) -> str:
     exp = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
     return jwt.encode(
         {"sub": str(user_id), "exp": exp, "type": "refresh"},
-        JWT_SECRET,
-        algorithm=JWT_ALGORITHM,
+        settings.jwt_secret,
+        algorithm=settings.JWT_ALGORITHM,
     )
 
 
@@ -50,7 +77,7 @@ def _as_dict(obj):
     }
 
 
-def login_with_google(*, db: Session, id_token: str, session_id: str | None = None):
+async def login_with_google(*, db: AsyncSession, id_token: str, session_id: str | None = None):
     google = _as_dict(verify_google_id_token(id_token))
 
     sub = google.get("sub")
@@ -61,47 +88,34 @@ def login_with_google(*, db: Session, id_token: str, session_id: str | None = No
     if not sub:
         raise ValueError("Invalid Google id_token payload (missing sub)")
 
-    # ✅ DB UNIQUE key is (provider, provider_subject)
-    oauth = (
-        db.query(OAuthAccount)
-        .filter(OAuthAccount.provider == "google")
-        .filter(OAuthAccount.provider_subject == sub)
-        .first()
-    )
+    cache_key = ("google", sub)
+    user = None
+    cached = _OAUTH_USER_CACHE.get(cache_key)
+    if cached is not None and cached[1] == email:
+        user = await db.get(User, cached[0])
+
+    if user is None:
+        # Single round trip: create the user only if this Google account is new,
+        # then upsert the oauth row on the DB UNIQUE key (provider, provider_subject).
+        result = await db.execute(
+            _UPSERT_OAUTH_ACCOUNT,
+            {"provider": "google", "subject": sub, "email": email, "name": name, "avatar": picture},
+        )
+        user_id = result.scalar_one()
 
-    if oauth:
-        user = db.query(User).filter(User.id == oauth.user_id).first()
+        user = await db.get(User, user_id)
         if not user:
+            _OAUTH_USER_CACHE.pop(cache_key, None)
             raise ValueError("OAuth account exists but user row is missing")
+        _OAUTH_USER_CACHE[cache_key] = (user_id, email)
 
-        # Optional: update profile fields
-        if name and getattr(user, "display_name", None) != name:
-            user.display_name = name
-        if picture and getattr(user, "avatar_url", None) != picture:
-            user.avatar_url = picture
-
-        # Optional: update email_at_auth
-        if email and oauth.email_at_auth != email:
-            oauth.email_at_auth = email
-
-        db.commit()
-    else:
-        # Create user
-        user = User(display_name=name, avatar_url=picture)
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-
-        # Create oauth account
-        oauth = OAuthAccount(
-            user_id=user.id,
-            provider="google",
-            provider_subject=sub,     # ✅ required
-            email_at_auth=email,      # ✅ correct column name
-            provider_user_id=sub,     # optional, but useful for your existing index
-        )
-        db.add(oauth)
-        db.commit()
+    # Optional: update profile fields
+    if name and getattr(user, "display_name", None) != name:
+        user.display_name = name
+    if picture and getattr(user, "avatar_url", None) != picture:
+        user.avatar_url = picture
+
+    await db.commit()
 
     _ = session_id  # reserved for Flow B (claim anon chats)
 
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-import os
 
 from google.oauth2 import id_token as google_id_token
 from google.auth.transport import requests as google_requests
 
+from app.core.config import settings
+
 
 @dataclass(frozen=True)
 class GoogleProfile:
@@ -17,7 +18,7 @@ class GoogleProfile:
 
 def verify_google_id_token(id_token: str) -> GoogleProfile:
     
-    client_id = os.getenv("GOOGLE_CLIENT_ID")
+    client_id = settings.GOOGLE_CLIENT_ID
     if not client_id:
         raise RuntimeError(
             "GOOGLE_CLIENT_ID is not configured. "
@@ -1,31 +1,101 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-import os
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from starlette.requests import Request
+import logging
+
+from app.core.config import settings
 
 # DATABASE_URL must be set in .env and injected via docker-compose
-DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_URL = settings.DATABASE_URL
+
+
+def _prepare_threshold(value: str) -> int | None:
+    return None if value.strip().lower() == "none" else int(value)
 
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL is not set in environment")
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
+# Connection pool sizing, per engine and per worker process. Each uvicorn
+# worker opens this async engine and chat's sync Core engine (same options),
+# so the deployment's worst case is
+#   WEB_CONCURRENCY x engines x (pool_size + max_overflow)
+# Both are derived from DB_CONNECTION_BUDGET so that total stays within it
+# whatever the worker count (e.g. 80 over four workers: 5 + 5 per engine).
+# Each engine keeps at least one connection, so past budget / 2 workers
+# raise the budget (and max_connections) or lower WEB_CONCURRENCY.
+_ENGINES_PER_WORKER = 2
+_CONNECTIONS_PER_ENGINE = max(
+    1, settings.DB_CONNECTION_BUDGET // (max(1, settings.WEB_CONCURRENCY) * _ENGINES_PER_WORKER)
 )
+_POOL_SIZE = (
+    settings.DB_POOL_SIZE
+    if settings.DB_POOL_SIZE is not None
+    else max(1, (_CONNECTIONS_PER_ENGINE + 1) // 2)
+)
+_MAX_OVERFLOW = (
+    settings.DB_MAX_OVERFLOW
+    if settings.DB_MAX_OVERFLOW is not None
+    else max(0, _CONNECTIONS_PER_ENGINE - _POOL_SIZE)
+)
+_MAX_CONNECTIONS = settings.WEB_CONCURRENCY * _ENGINES_PER_WORKER * (_POOL_SIZE + _MAX_OVERFLOW)
+if _MAX_CONNECTIONS > settings.DB_CONNECTION_BUDGET:
+    logging.getLogger("prepareup.db").warning(
+        "DB pools allow %d connections across %d workers, over DB_CONNECTION_BUDGET=%d.",
+        _MAX_CONNECTIONS,
+        settings.WEB_CONCURRENCY,
+        settings.DB_CONNECTION_BUDGET,
+    )
+
+ENGINE_OPTIONS = {
+    "pool_size": _POOL_SIZE,
+    "max_overflow": _MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": True,
+}
+if DATABASE_URL.startswith("postgresql"):
+    ENGINE_OPTIONS["connect_args"] = {
+        # Bound runaway queries server-side (milliseconds)
+        "options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}",
+        # psycopg prepares a query server-side once it has run this many times
+        # on a connection, so hot lookups skip parse/plan afterwards. Set
+        # DB_PREPARE_THRESHOLD to "none" behind a transaction-mode pooler.
+        "prepare_threshold": _prepare_threshold(settings.DB_PREPARE_THRESHOLD),
+    }
 
-# Session factory
-SessionLocal = sessionmaker(
-    autocommit=False,
+# Create SQLAlchemy engine. psycopg 3 drives both sync and asyncio, so the
+# same postgresql+psycopg:// URL serves this async engine and Alembic's sync one.
+engine = create_async_engine(DATABASE_URL, **ENGINE_OPTIONS)
+
+# Session factory. Objects stay usable after commit without a reload, since
+# attribute refreshes can't lazily hit the database under asyncio.
+SessionLocal = async_sessionmaker(
+    engine,
+    class_=AsyncSession,
     autoflush=False,
-    bind=engine,
+    expire_on_commit=False,
 )
 
 
-# FastAPI dependency
-def get_db():
-    db = SessionLocal()
-    try:
+# Execution options for sessions that only read: autocommit skips the
+# BEGIN/COMMIT round trips, and a read-only connection never needs an XID.
+READ_ONLY_OPTIONS = {"isolation_level": "AUTOCOMMIT"}
+if DATABASE_URL.startswith("postgresql"):
+    READ_ONLY_OPTIONS["postgresql_readonly"] = True
+
+
+# FastAPI dependency for read-only endpoints
+async def get_db_ro():
+    async with SessionLocal() as db:
+        await db.connection(execution_options=READ_ONLY_OPTIONS)
         yield db
-    finally:
-        db.close()
+
+
+# Request-scoped FastAPI dependency. The session is kept on request.state so
+# code that only has the Request (not the injected session) shares the same
+# unit of work. As a plain callable rather than a generator it skips FastAPI's
+# per-request exit stack; DbSessionMiddleware closes the session once the
+# response has been sent.
+class DbDep:
+    async def __call__(self, request: Request) -> AsyncSession:
+        db = getattr(request.state, "db", None)
+        if db is None:
+            db = request.state.db = SessionLocal()
+        return db
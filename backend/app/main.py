@@ -1,28 +1,34 @@
-from fastapi import FastAPI, Request, Response
-from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.sessions import SessionMiddleware
-import os
-import uuid
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from starlette.middleware.gzip import GZipMiddleware
+import importlib
 import logging
 
 from dotenv import load_dotenv
 load_dotenv()
 
+# Use uvloop's event loop when available, whatever server imports the app
+# (the Docker entrypoint also passes --loop uvloop to uvicorn).
+try:
+    import uvloop
+except ImportError:  # pragma: no cover
+    uvloop = None
+else:
+    uvloop.install()
+
+from app.api.health import HEALTH_BODY
 from app.core.config import settings
-from app.api.health import router as health_router
-from app.api.hello import router as hello_router
-from app.api.dashboard import router as dashboard_router
-from app.api.upload import router as upload_router
-from app.api.generate import router as generate_router
-from app.api.chat import router as chat_router
-from app.api.discord_integration import router as discord_router
-from app.api.auth import router as auth_router
-from app.api.podcast_audio import router as podcast_audio_router
-from app.api.quiz import router as quiz_router
-from app.api.voice import router as voice_router
+from app.middleware.combined import CoreMiddleware
+from app.middleware.db_session import DbSessionMiddleware
+from app.middleware.health_probe import HealthProbeMiddleware
+from app.middleware.scoped_session import ScopedSessionMiddleware
 
 logger = logging.getLogger("prepareup.startup")
 
+# Arbitrary constant key for the Postgres advisory lock that serializes
+# migrations when several uvicorn workers start at once.
+_MIGRATION_LOCK_KEY = 0x5052_4550_5550  # "PREPUP"
+
 
 def _run_migrations() -> None:
     """Run Alembic migrations programmatically on startup.
@@ -30,7 +36,7 @@ def _run_migrations() -> None:
     This avoids requiring a manual `alembic upgrade head` and ensures
     migrations run inside the Docker network where DB DNS resolution works.
     """
-    db_url = os.environ.get("DATABASE_URL")
+    db_url = settings.DATABASE_URL
     if not db_url:
         logger.error(
             "DATABASE_URL is not set — Alembic migrations will NOT run. "
@@ -41,10 +47,23 @@ def _run_migrations() -> None:
     try:
         from alembic.config import Config
         from alembic import command
+        from sqlalchemy import create_engine, pool, text
 
         alembic_cfg = Config("/app/alembic.ini")
         alembic_cfg.set_main_option("sqlalchemy.url", db_url)
-        command.upgrade(alembic_cfg, "head")
+
+        # With multiple workers every process runs this hook; only one may
+        # migrate at a time; the others find the schema already at head.
+        lock_engine = create_engine(db_url, poolclass=pool.NullPool)
+        try:
+            with lock_engine.connect() as lock_conn:
+                lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _MIGRATION_LOCK_KEY})
+                try:
+                    command.upgrade(alembic_cfg, "head")
+                finally:
+                    lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _MIGRATION_LOCK_KEY})
+        finally:
+            lock_engine.dispose()
         logger.info("Alembic migrations applied successfully.")
     except Exception as exc:
         # Log the full error prominently so it's visible in docker compose logs.
@@ -59,72 +78,92 @@ def _run_migrations() -> None:
         )
 
 
-app = FastAPI(title=settings.APP_NAME, on_startup=[_run_migrations])
+# (module, prefix) for every router. Modules are imported when registered;
+# their own startup/shutdown hooks ride along on the router and run after
+# the migrations hook below.
+_ROUTER_SPECS: tuple[tuple[str, str], ...] = (
+    ("app.api.health", ""),
+    ("app.api.hello", ""),
+    ("app.api.auth", "/api"),
+    ("app.api.dashboard", "/api"),
+    ("app.api.upload", "/api"),
+    ("app.api.generate", "/api"),
+    ("app.api.chat", "/api"),
+    ("app.api.discord_integration", "/api"),
+    ("app.api.podcast_audio", "/api"),
+    ("app.api.quiz", "/api"),
+    ("app.api.voice", "/api"),
+)
+
+
+# Comma-separated router names (e.g. "generate,discord_integration") that this
+# process should not serve. Their modules are never imported, so a worker
+# that doesn't serve them skips the SDKs and clients they pull in.
+_DISABLED_ROUTERS = frozenset(
+    name.strip() for name in settings.DISABLED_ROUTERS.split(",") if name.strip()
+)
+
+
+def _register_routers(app: FastAPI) -> None:
+    for module_name, prefix in _ROUTER_SPECS:
+        if module_name.rsplit(".", 1)[-1] in _DISABLED_ROUTERS:
+            logger.info("Router %s disabled via DISABLED_ROUTERS.", module_name)
+            continue
+        app.include_router(importlib.import_module(module_name).router, prefix=prefix)
+
+
+app = FastAPI(
+    title=settings.APP_NAME,
+    default_response_class=ORJSONResponse,
+    on_startup=[_run_migrations],
+)
 
-COOKIE_SECURE = os.getenv("COOKIE_SECURE", "false").strip().lower() in {"1", "true", "yes", "on"}
-COOKIE_DOMAIN = (os.getenv("COOKIE_DOMAIN") or "").strip() or None
+COOKIE_SECURE = settings.COOKIE_SECURE
+COOKIE_DOMAIN = (settings.COOKIE_DOMAIN or "").strip() or None
 ANON_COOKIE_MAX_AGE = 60 * 60 * 24 * 30
 
 # CORS: allow credentials so cookies work across localhost:3000 → localhost:8000
 # CORS_ORIGINS env var is a comma-separated list; defaults to localhost:3000 for dev.
-_raw_origins = os.getenv("CORS_ORIGINS", "http://localhost:3000")
-CORS_ORIGINS_LIST: list[str] = [o.strip() for o in _raw_origins.split(",") if o.strip()]
+CORS_ORIGINS_LIST: list[str] = settings.cors_origins_list
 # Always include localhost variants so local dev never breaks
 for _extra in ("http://localhost:3000", "http://127.0.0.1:3000"):
     if _extra not in CORS_ORIGINS_LIST:
         CORS_ORIGINS_LIST.append(_extra)
 
+# Session cookie (Discord OAuth state + tokens), only on the Discord routes
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=CORS_ORIGINS_LIST,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Session cookie (Discord OAuth state + tokens)
-app.add_middleware(
-    SessionMiddleware,
-    secret_key=os.getenv("APP_SECRET", "dev_secret_change_me"),
+    ScopedSessionMiddleware,
+    path_prefixes=("/api/auth/discord", "/api/discord"),
+    secret_key=settings.APP_SECRET,
     session_cookie="prepareup_session",
     same_site="lax",
     https_only=False,
 )
 
-# Anonymous ownership cookie (anon chat + claim-on-login)
-@app.middleware("http")
-async def ensure_anon_session(request: Request, call_next):
-    sid = (request.cookies.get("pu_session_id") or "").strip()
-    response: Response = await call_next(request)
-
-    if sid:
-        return response
-
-    new_sid = str(uuid.uuid4())
-    cookie_kwargs = {
-        "key": "pu_session_id",
-        "value": new_sid,
-        "httponly": True,
-        "samesite": "lax",
-        "secure": COOKIE_SECURE,
-        "path": "/",
-        "max_age": ANON_COOKIE_MAX_AGE,
-    }
-    if COOKIE_DOMAIN:
-        cookie_kwargs["domain"] = COOKIE_DOMAIN
-
-    response.set_cookie(**cookie_kwargs)
-    return response
+# Closes the request-scoped DB session (DbDep) after the response
+app.add_middleware(DbSessionMiddleware)
+
+# Compress larger JSON bodies (thread lists, transcripts, generated outputs)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# On-demand request profiling (?profile=1), inside CORS so the report is
+# readable cross-origin
+if settings.PROFILE_ENABLED:
+    from app.middleware.profiling import ProfileMiddleware
+
+    app.add_middleware(ProfileMiddleware)
+
+# CORS (credentialed, any method/header) + anonymous ownership cookie
+app.add_middleware(
+    CoreMiddleware,
+    allow_origins=CORS_ORIGINS_LIST,
+    max_age=ANON_COOKIE_MAX_AGE,
+    secure=COOKIE_SECURE,
+    domain=COOKIE_DOMAIN,
+)
+
+# Liveness probes short-circuit ahead of everything above
+app.add_middleware(HealthProbeMiddleware, path="/health", body=HEALTH_BODY)
 
 # Routers
-app.include_router(health_router)
-app.include_router(hello_router)
-app.include_router(auth_router, prefix="/api")
-app.include_router(dashboard_router, prefix="/api")
-app.include_router(upload_router, prefix="/api")
-app.include_router(generate_router, prefix="/api")
-app.include_router(chat_router, prefix="/api")
-app.include_router(discord_router, prefix="/api")
-app.include_router(podcast_audio_router, prefix="/api")
-app.include_router(quiz_router, prefix="/api")
-app.include_router(voice_router, prefix="/api")
+_register_routers(app)
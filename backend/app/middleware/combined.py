@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import uuid
+from typing import Iterable, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+ANON_COOKIE_NAME = "pu_session_id"
+
+_CORS_ALLOW_METHODS = b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"
+_CORS_MAX_AGE = b"600"
+
+
+class CoreMiddleware:
+    """CORS plus the anonymous ownership cookie (anon chat + claim-on-login).
+
+    Both used to be separate middleware layers; as one pure ASGI class a
+    request pays a single wrapper. It reads the headers it needs in one
+    pass, answers CORS preflights directly, and adds the CORS and
+    Set-Cookie headers to the response start message.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        allow_origins: Iterable[str],
+        max_age: int,
+        secure: bool = False,
+        domain: Optional[str] = None,
+    ) -> None:
+        self.app = app
+        self._allow_origins = frozenset(o.encode("latin-1") for o in allow_origins)
+        self._allow_all_origins = b"*" in self._allow_origins
+        attrs = f"; HttpOnly; Max-Age={max_age}; Path=/; SameSite=lax"
+        if domain:
+            attrs += f"; Domain={domain}"
+        if secure:
+            attrs += "; Secure"
+        self._cookie_attrs = attrs.encode("latin-1")
+
+    def _origin_allowed(self, origin: bytes) -> bool:
+        return self._allow_all_origins or origin in self._allow_origins
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin = b""
+        has_anon_cookie = False
+        preflight_method = b""
+        preflight_headers = b""
+        for key, value in scope["headers"]:
+            if key == b"origin":
+                origin = value
+            elif key == b"cookie" and not has_anon_cookie:
+                has_anon_cookie = _has_cookie(value, ANON_COOKIE_NAME.encode())
+            elif key == b"access-control-request-method":
+                preflight_method = value
+            elif key == b"access-control-request-headers":
+                preflight_headers = value
+
+        if scope["method"] == "OPTIONS" and origin and preflight_method:
+            await self._preflight(origin, preflight_headers, send)
+            return
+
+        extra_headers: list[tuple[bytes, bytes]] = []
+        if origin and self._origin_allowed(origin):
+            extra_headers.append((b"access-control-allow-origin", origin))
+            extra_headers.append((b"access-control-allow-credentials", b"true"))
+        if not has_anon_cookie:
+            extra_headers.append((
+                b"set-cookie",
+                f"{ANON_COOKIE_NAME}={uuid.uuid4()}".encode("latin-1") + self._cookie_attrs,
+            ))
+
+        if not origin and not extra_headers:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                if origin:
+                    _add_vary_origin(headers)
+                headers.extend(extra_headers)
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _preflight(self, origin: bytes, requested_headers: bytes, send: Send) -> None:
+        if not self._origin_allowed(origin):
+            body = b"Disallowed CORS origin"
+            await send({
+                "type": "http.response.start",
+                "status": 400,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"vary", b"Origin"),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        headers = [
+            (b"access-control-allow-origin", origin),
+            (b"access-control-allow-credentials", b"true"),
+            (b"access-control-allow-methods", _CORS_ALLOW_METHODS),
+            (b"access-control-max-age", _CORS_MAX_AGE),
+            (b"vary", b"Origin"),
+        ]
+        if requested_headers:
+            headers.append((b"access-control-allow-headers", requested_headers))
+        await send({"type": "http.response.start", "status": 204, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
+
+
+def _has_cookie(header: bytes, name: bytes) -> bool:
+    """Whether a Cookie header value carries a non-empty cookie ``name``."""
+    for part in header.split(b";"):
+        k, sep, v = part.strip().partition(b"=")
+        if sep and k == name and v.strip():
+            return True
+    return False
+
+
+def _add_vary_origin(headers: list[tuple[bytes, bytes]]) -> None:
+    for i, (key, value) in enumerate(headers):
+        if key.lower() == b"vary":
+            headers[i] = (key, value + b", Origin")
+            return
+    headers.append((b"vary", b"Origin"))
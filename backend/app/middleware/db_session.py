@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class DbSessionMiddleware:
+    """Close the request-scoped session opened by ``DbDep``.
+
+    ``DbDep`` stores the session on ``request.state`` (``scope["state"]``);
+    once the app has finished with the request, including any streamed
+    body, the session is closed and its connection returned to the pool.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            state = scope.get("state")
+            db = state.pop("db", None) if state else None
+            if db is not None:
+                await db.close()
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class HealthProbeMiddleware:
+    """Answer liveness probes before any other middleware runs.
+
+    Registered outermost, so a GET/HEAD on ``path`` gets the precomputed
+    ``body`` straight away without passing through CORS, sessions, gzip or
+    routing. Every other request is passed through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, *, path: str, body: bytes) -> None:
+        self.app = app
+        self._path = path
+        self._body = body
+        self._start = {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] == "http"
+            and scope["path"] == self._path
+            and scope["method"] in ("GET", "HEAD")
+        ):
+            await send(self._start)
+            await send({
+                "type": "http.response.body",
+                "body": b"" if scope["method"] == "HEAD" else self._body,
+            })
+            return
+        await self.app(scope, receive, send)
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from urllib.parse import parse_qs
+
+from pyinstrument import Profiler
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class ProfileMiddleware:
+    """Serve a pyinstrument profile of the request when ``?profile=1`` is set.
+
+    The wrapped app runs normally under the profiler, but its response is
+    discarded and replaced with the profiler's HTML report. Only registered
+    when ``settings.PROFILE_ENABLED`` is on (dev/staging); other requests
+    only pay a substring pre-check before the query string is parsed.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not _profile_requested(scope["query_string"]):
+            await self.app(scope, receive, send)
+            return
+
+        async def discard(message: Message) -> None:
+            pass
+
+        profiler = Profiler(async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            profiler.stop()
+
+        body = profiler.output_html().encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/html; charset=utf-8"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def _profile_requested(query_string: bytes) -> bool:
+    # Cheap substring test first; parse only when "profile" appears at all
+    if b"profile" not in query_string:
+        return False
+    values = parse_qs(query_string.decode("latin-1")).get("profile", ())
+    return "1" in values
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from typing import Any, Sequence
+
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class ScopedSessionMiddleware(SessionMiddleware):
+    """SessionMiddleware that only runs for the given path prefixes.
+
+    The signed session cookie is only read by the Discord OAuth/integration
+    routes; every other request skips cookie parsing and signature checks.
+    """
+
+    def __init__(self, app: ASGIApp, *, path_prefixes: Sequence[str], **kwargs: Any) -> None:
+        super().__init__(app, **kwargs)
+        self.path_prefixes = tuple(path_prefixes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] in ("http", "websocket") and scope["path"].startswith(self.path_prefixes):
+            await super().__call__(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
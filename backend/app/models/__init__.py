@@ -1,4 +1,5 @@
 from app.models.user import User  # noqa: F401
+from app.models.oauth_account import OAuthAccount  # noqa: F401
 from app.models.project import Project  # noqa: F401
 from app.models.document import Document  # noqa: F401
 from app.models.job import Job  # noqa: F401
\ No newline at end of file
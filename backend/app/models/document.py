@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import DateTime, ForeignKey, Integer, String, func
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -7,10 +7,12 @@ from app.db.base import Base
 
 class Document(Base):
     __tablename__ = "documents"
+    # Serves "documents of a project, by upload time" and plain project_id lookups
+    __table_args__ = (Index("ix_documents_project_created", "project_id", "created_at"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     project_id: Mapped[int] = mapped_column(
-        ForeignKey("projects.id", ondelete="CASCADE"), index=True, nullable=False
+        ForeignKey("projects.id", ondelete="CASCADE"), nullable=False
     )
 
     filename: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -22,4 +24,4 @@ class Document(Base):
     )
 
     project = relationship("Project", back_populates="documents")
-    jobs = relationship("Job", back_populates="document", cascade="all, delete-orphan")
\ No newline at end of file
+    jobs = relationship("Job", back_populates="document", cascade="all, delete-orphan", lazy="selectin")
\ No newline at end of file
@@ -1,9 +1,12 @@
 from datetime import datetime
-from sqlalchemy import DateTime, ForeignKey, Integer, String, func
+from sqlalchemy import DateTime, Enum, ForeignKey, Integer, String, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
 
+JobType = Enum("process_document", name="job_type")
+JobStatus = Enum("queued", "running", "done", "failed", name="job_status")
+
 
 class Job(Base):
     __tablename__ = "jobs"
@@ -13,8 +16,8 @@ class Job(Base):
         ForeignKey("documents.id", ondelete="CASCADE"), index=True, nullable=False
     )
 
-    type: Mapped[str] = mapped_column(String(50), nullable=False)  # e.g. process_document
-    status: Mapped[str] = mapped_column(String(30), nullable=False, default="queued")
+    type: Mapped[str] = mapped_column(JobType, nullable=False)
+    status: Mapped[str] = mapped_column(JobStatus, nullable=False, default="queued")
     error: Mapped[str | None] = mapped_column(String(1000), nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(
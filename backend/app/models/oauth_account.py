@@ -3,20 +3,25 @@ from __future__ import annotations
 from datetime import datetime
 import uuid
 
-from sqlalchemy import DateTime, ForeignKey, String, func
+from sqlalchemy import DateTime, ForeignKey, Index, String, UniqueConstraint, func, text
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
 
 
 class OAuthAccount(Base):
     __tablename__ = "oauth_accounts"
+    __table_args__ = (
+        UniqueConstraint("provider", "provider_subject", name="uq_oauth_provider_subject"),
+        Index("ix_oauth_provider_user_id", "provider", "provider_user_id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
-        default=uuid.uuid4,
+        # Generated by Postgres (time-ordered v7) and returned via RETURNING
+        server_default=text("uuid_generate_v7()"),
     )
 
     user_id: Mapped[uuid.UUID] = mapped_column(
@@ -34,11 +39,13 @@ class OAuthAccount(Base):
     # ✅ Nullable by DB
     email_at_auth: Mapped[str | None] = mapped_column(String(255), nullable=True)
 
-    # ✅ Nullable by DB (you already have an index on (provider, provider_user_id))
+    # ✅ Nullable by DB (indexed with provider, see __table_args__)
     provider_user_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
         nullable=False,
-    )
\ No newline at end of file
+    )
+
+    user = relationship("User", back_populates="oauth_accounts")
\ No newline at end of file
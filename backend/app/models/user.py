@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 import uuid
 
-from sqlalchemy import DateTime, String, func
+from sqlalchemy import DateTime, String, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -16,7 +16,8 @@ class User(Base):
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
-        default=uuid.uuid4,
+        # Generated by Postgres (time-ordered v7) and returned via RETURNING
+        server_default=text("uuid_generate_v7()"),
     )
 
     display_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
@@ -29,4 +30,5 @@ class User(Base):
         nullable=False,
     )
 
-    projects = relationship("Project", back_populates="user", cascade="all, delete-orphan")
\ No newline at end of file
+    projects = relationship("Project", back_populates="user", cascade="all, delete-orphan")
+    oauth_accounts = relationship("OAuthAccount", back_populates="user", cascade="all, delete-orphan")
\ No newline at end of file